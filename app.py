@@ -14,6 +14,14 @@ Iman Kiio iwk4
 from consts import *
 from game2d import *
 from wave import *
+from replay import InputRecorder
+from profiler import PhaseProfiler
+from hud import FrameHud
+from telemetry import Telemetry
+from rewind import RewindBuffer
+import os
+import random
+import time
 
 
 # PRIMARY RULE: Invaders can only access attributes in wave.py via getters/setters
@@ -81,9 +89,44 @@ class Invaders(GameApp):
     #
     #Attribute _time:Total since  last update call in STATE_PAUSED
     #Invariant: _time is time in seconds
+    #
+    #Attribute _accumulator: frame time not yet simulated by _wave
+    #Invariant: _accumulator is a float >= 0, in seconds (always 0 if LOGIC_RATE is 0)
+    #
+    #Attribute _recorder: the log of the input to the current wave
+    #Invariant: _recorder is an InputRecorder while a wave is in STATE_ACTIVE or
+    #STATE_PAUSED and INPUT_LOG_DIR is not None, and None otherwise
+    #
+    #Attribute _profiler: the phase timings of the waves played
+    #Invariant: _profiler is a PhaseProfiler keeping PROFILE_FRAMES frames, or
+    #None if PROFILE_FRAMES is 0
+    #
+    #Attribute _hud: the frame-time overlay, shown and hidden with HUD_KEY
+    #Invariant: _hud is a FrameHud
+    #
+    #Attribute _telemetry: the stream of frames, states and wave events
+    #Invariant: _telemetry is a Telemetry writing to TELEMETRY_PATH, or None if
+    #TELEMETRY_PATH is None
+    #
+    #Attribute _rewind: the recent history of the current wave
+    #Invariant: _rewind is a RewindBuffer holding a frame per wave update since
+    #the wave began (up to REWIND_SECONDS), or None if REWIND_KEY is None
+    #
+    #Attribute _rewindDown: whether REWIND_KEY was held down last frame
+    #Invariant: _rewindDown is a bool
 
     # DO NOT MAKE A NEW INITIALIZER!
 
+    # GETTERS
+    def getProfileReport(self):
+        """
+        Returns the phase timings of the waves played as a table, or None if
+        PROFILE_FRAMES is 0
+        """
+        if self._profiler is None:
+            return None
+        return self._profiler.report()
+
     # THREE MAIN GAMEAPP METHODS
     def start(self):
         """
@@ -106,6 +149,15 @@ class Invaders(GameApp):
         self._wave=None
         self._score=None
         self._lives=None
+        self._accumulator=0.0
+        self._recorder=None
+        self._profiler=PhaseProfiler(PROFILE_FRAMES) if PROFILE_FRAMES>0 else None
+        self._hud=FrameHud()
+        self._telemetry=None if TELEMETRY_PATH is None else Telemetry(TELEMETRY_PATH)
+        self._rewind=None
+        if not REWIND_KEY is None:
+            self._rewind=RewindBuffer(REWIND_SECONDS,LOGIC_RATE if LOGIC_RATE>0 else 60)
+        self._rewindDown=False
 
 
     def update(self,dt):
@@ -182,6 +234,12 @@ class Invaders(GameApp):
         if self._state==STATE_NEWGAME:
             self._new_game(dt)
 
+        if not self._recorder is None:
+            self._recorder.record(self.input,dt)
+            if self._state!=STATE_ACTIVE and self._state!=STATE_PAUSED:
+                self._recorder.close()
+                self._recorder=None
+
 
     def draw(self):
         """
@@ -209,7 +267,53 @@ class Invaders(GameApp):
             except:
                 pass
 
+    def _refresh(self,dt):
+        """
+        Processes a single animation frame, measuring it for the overlay _hud
+
+        This replaces GameApp._refresh, which Kivy calls every frame. It does
+        the same work (clear the view, update, draw), timing update and draw,
+        and then draws _hud on top of everything else.
+
+        Parameter dt: The time in seconds since last update
+        Precondition: dt is a number (int or float)
+        """
+        clock=time.perf_counter
+        start=clock()
+        self.view.clear()
+        self.update(dt)
+        middle=clock()
+        self.draw()
+        end=clock()
+        self._hud.toggle(self.input)
+        self._hud.record(dt,middle-start,end-middle,self.view.draw_count)
+        self._hud.draw(self.view)
+        if not self._telemetry is None:
+            self._telemetry.frame(dt,middle-start,end-middle,self.view.draw_count)
+
+    def on_stop(self):
+        """
+        Closes the telemetry stream when Kivy stops the game
+        """
+        if not self._telemetry is None:
+            self._telemetry.close()
+
     # HELPER METHODS FOR THE STATES GO HERE
+    def _change_state(self,state):
+        """
+        Changes the game state to state, recording the change in _telemetry
+
+        The input log is flushed on every change, so a crash loses little of it.
+
+        Parameter state: The new state
+        Precondition: state is one of the STATE constants
+        """
+        if not self._telemetry is None and state!=self._state:
+            self._telemetry.state(self._state,state)
+        if not self._recorder is None and state!=self._state:
+            self._recorder.flush()
+        self._state=state
+
     def _inactive(self):
         """
         Helper method for STATE_INACTIVE
@@ -219,15 +323,26 @@ class Invaders(GameApp):
         self._text=GLabel(text="Press S to play",x=GAME_WIDTH/2,y=GAME_HEIGHT/2,font_name="Arcade.ttf",font_size=64)
 
         if  self.input.is_key_down('s'):
-            self._state=STATE_NEWWAVE
+            self._change_state(STATE_NEWWAVE)
 
     def _new_wave(self):
         """
         Helper method for STATE_NEWWAVE
         Creates a new wave object. Changes state to STATE_ACTIVE
+
+        If INPUT_LOG_DIR is not None, the input to the wave is recorded there,
+        along with the seed of its random number generator.
         """
-        self._wave=Wave()
-        self._state=STATE_ACTIVE
+        seed=random.getrandbits(64)
+        self._wave=Wave(random.Random(seed))
+        self._wave.setProfiler(self._profiler)
+        if not self._rewind is None:
+            self._rewind.clear()
+        if not INPUT_LOG_DIR is None:
+            name=time.strftime('wave-%Y%m%d-%H%M%S.inp')
+            self._recorder=InputRecorder(os.path.join(INPUT_LOG_DIR,name),seed)
+        self._accumulator=0.0
+        self._change_state(STATE_ACTIVE)
 
     def _active(self,dt):
         """
@@ -235,6 +350,15 @@ class Invaders(GameApp):
         Assigns appropriate texts to _lives and _score. Calls update method in _wave
         Changes state to STATE_COMPLETE if game over
 
+        If LOGIC_RATE is not 0, the wave is updated in fixed steps of 1/LOGIC_RATE
+        seconds. The frame time is added to _accumulator, and as many whole steps
+        are run as it holds (at most MAX_LOGIC_STEPS), so the game plays the same
+        at any frame rate. Otherwise the wave is updated once with dt.
+
+        If REWIND_KEY is not None, each wave update is recorded in _rewind, and
+        on a frame where REWIND_KEY is pressed the wave is rewound instead of
+        updated.
+
         Parameter dt :The time in seconds since last update
         Precondition: dt is a number (int or float)
         """
@@ -249,17 +373,87 @@ class Invaders(GameApp):
         self._score=GLabel(y=GAME_HEIGHT-MESSAGE_HEIGHT,x=MESSAGE_WIDTH,font_name="Arcade.ttf",font_size=40)
         #get current score from _wave
         self._score.text="Score:"+" "+str(self._wave.getScore())
+        if self._rewound():
+            return
         #call update method in _wave
-        self._wave.update(self.input,dt)
+        if LOGIC_RATE==0:
+            self._wave.update(self.input,dt)
+            self._record_frame()
+            self._log_events()
+            self._check_wave()
+            return
+        step=1.0/LOGIC_RATE
+        self._accumulator+=dt
+        steps=0
+        while self._accumulator>=step and self._state==STATE_ACTIVE:
+            self._wave.update(self.input,step)
+            self._accumulator-=step
+            self._record_frame()
+            self._log_events()
+            self._check_wave()
+            steps+=1
+            if steps==MAX_LOGIC_STEPS:
+                #drop the backlog rather than fall further behind
+                self._accumulator=0.0
+        if self._state!=STATE_ACTIVE:
+            self._accumulator=0.0
+
+    def _rewound(self):
+        """
+        Helper method for STATE_ACTIVE
+        Rewinds _wave by REWIND_JUMP seconds (or to the oldest frame held) when
+        REWIND_KEY is pressed, and returns True if it did
+
+        The wave is rewound once per press, not once per frame the key is held.
+        A rewind ends the input log of the wave, as a log cannot replay it.
+        """
+        if self._rewind is None:
+            return False
+        down=self.input.is_key_down(REWIND_KEY)
+        pressed=down and not self._rewindDown
+        self._rewindDown=down
+        if not pressed or self._rewind.getNewest() is None:
+            return False
+        rate=LOGIC_RATE if LOGIC_RATE>0 else 60
+        frame=max(self._rewind.getOldest(),self._rewind.getNewest()-int(REWIND_JUMP*rate))
+        self._rewind.rewind(self._wave,frame)
+        self._accumulator=0.0
+        if not self._recorder is None:
+            self._recorder.close()
+            self._recorder=None
+        return True
+
+    def _record_frame(self):
+        """
+        Helper method for STATE_ACTIVE
+        Records the state of _wave after an update in _rewind
+        """
+        if not self._rewind is None:
+            self._rewind.record(self._wave)
+
+    def _log_events(self):
+        """
+        Helper method for STATE_ACTIVE
+        Records the events of the last wave update in _telemetry
+        """
+        if not self._telemetry is None:
+            for event in self._wave.getEvents():
+                self._telemetry.waveEvent(event)
+
+    def _check_wave(self):
+        """
+        Helper method for STATE_ACTIVE
+        Changes state to STATE_COMPLETE if game over, or STATE_PAUSED if the ship is destroyed
+        """
         #if game is over, change state
         if  not self._wave.hasPlayerWon() is None:
-            self._state=STATE_COMPLETE
+            self._change_state(STATE_COMPLETE)
         #if ship is blown up, change state as appropriate
         if self._wave.isShipDestroyed():
             if self._wave.isLifeLeft():
-                self._state=STATE_PAUSED
+                self._change_state(STATE_PAUSED)
             else:
-                self._state=STATE_COMPLETE
+                self._change_state(STATE_COMPLETE)
 
     def _paused(self):
         """
@@ -270,7 +464,7 @@ class Invaders(GameApp):
         self._text=GLabel(text="Press S to Continue",x=GAME_WIDTH/2,y=GAME_HEIGHT/2,font_name="Arcade.ttf",font_size=64)
         #change state if specified key is pressed
         if  self.input.is_key_down('s'):
-            self._state=STATE_ACTIVE
+            self._change_state(STATE_ACTIVE)
             self._wave.createNewShip()
             self._wave.resetShipDestroyed()
 
@@ -278,13 +472,18 @@ class Invaders(GameApp):
         """
         Helper Method for STATE_COMPLETE
         Changes state to STATE_NEWGAME  and displays messages as appropriate
+
+        If the waves are being profiled, the phase timings are added to
+        _telemetry (see also getProfileReport).
         """
+        if not self._profiler is None and not self._telemetry is None:
+            self._telemetry.profile(self._profiler.getSummary())
         if self._wave.hasPlayerWon()==True:
             self._text=GLabel(text="Congratulations",x=GAME_WIDTH/2,y=GAME_HEIGHT/2,font_name="Arcade.ttf",font_size=64)
         else:
             self._text=GLabel(text="Sorry.You Lose!!!",x=GAME_WIDTH/2,y=GAME_HEIGHT/2,font_name="Arcade.ttf",font_size=64)
 
-        self._state=STATE_NEWGAME
+        self._change_state(STATE_NEWGAME)
 
     def _new_game(self,dt):
         """
@@ -301,5 +500,5 @@ class Invaders(GameApp):
 
         #start new game after approximately another two  seconds and reset _time
         if abs(self._time-4)<0.1:
-            self._state=STATE_INACTIVE
+            self._change_state(STATE_INACTIVE)
             self._time=0
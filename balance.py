@@ -0,0 +1,345 @@
+"""
+Monte Carlo balancing module for Alien Invaders
+
+This module plays thousands of headless games (see simulation.py) with a
+computer player, over a grid of settings, and reports for each setting how
+often the player wins, how long a game lasts, and how many frames a second
+the simulation ran at. It is for checking a change to consts.py without
+playing it by hand.
+
+The games are spread over the cores of the machine with a process pool.
+Every game is seeded, so a run can be repeated exactly.
+
+There are two players (policies):
+
+    random     holds a random set of keys, changed every few frames
+    scripted   dodges alien bolts above the ship, and otherwise lines up
+               under the nearest alien that can be hit and fires
+
+To run a sweep from the command line, type for example
+
+    python balance.py --speeds=1.0,0.5 --rates=5,2 --sizes=5x12,3x6 --games=200
+
+The other options are --bolt-speeds, --lives, --policy, --workers,
+--max-seconds and --seed. Lists are separated by commas.
+
+Peter Ng'ang'a Wainaina pnw6
+Iman Kiio iwk4
+6th December 2021
+"""
+from consts import *
+from simulation import *
+from options import parse_options
+import concurrent.futures
+import itertools
+import random
+import sys
+import time
+
+# The names of the policies
+BALANCE_POLICIES = ('random','scripted')
+# The key sets the random policy chooses from
+BALANCE_KEYS = ((),('left',),('right',),('up',),('left','up'),('right','up'))
+# The number of frames the random policy holds its keys
+BALANCE_HOLD = 10
+# The height above the ship in which the scripted policy dodges alien bolts
+BALANCE_DANGER = 150
+# The default longest game, in seconds of play, before it counts as a loss
+BALANCE_MAX_SECONDS = 600
+# The number of games given to a worker at a time
+BALANCE_CHUNK = 25
+
+
+class BalanceConfig(object):
+    """
+    A class representing one setting of the sweep.
+
+    Attribute rows: the number of rows of aliens
+    Invariant: rows is an int > 0
+
+    Attribute columns: the number of aliens per row
+    Invariant: columns is an int > 0
+
+    Attribute speed: the number of seconds between alien steps
+    Invariant: speed is a float > 0
+
+    Attribute rate: the most alien steps between alien bolts
+    Invariant: rate is an int > 0
+
+    Attribute boltSpeed: the number of pixels a bolt moves per update
+    Invariant: boltSpeed is a number > 0
+
+    Attribute lives: the number of lives the player starts with
+    Invariant: lives is an int > 0
+    """
+
+    def getName(self):
+        """
+        Returns the name of this setting in the report
+        """
+        return '%dx%d speed=%s rate=%d bolt=%s lives=%d' % (self.rows,self.columns,
+            self.speed,self.rate,self.boltSpeed,self.lives)
+
+    def __init__(self,rows,columns,speed,rate,boltSpeed,lives):
+        """
+        Initializes a setting (see the class invariants for the preconditions)
+        """
+        self.rows=rows
+        self.columns=columns
+        self.speed=speed
+        self.rate=rate
+        self.boltSpeed=boltSpeed
+        self.lives=lives
+
+    def newSim(self,seed):
+        """
+        Returns a new WaveSim with this setting
+
+        Parameter seed: The seed of the random number generator of the wave
+        Precondition: seed is an int
+        """
+        return WaveSim(random.Random(seed),self.rows,self.columns,self.speed,
+            self.rate,self.boltSpeed,self.lives)
+
+
+class RandomPolicy(object):
+    """
+    A player that holds a random set of keys, changed every BALANCE_HOLD frames.
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _rng: the source of the key choices
+    # Invariant: _rng is a random.Random object
+    #
+    # Attribute _inputs: the input for each set of keys in BALANCE_KEYS
+    # Invariant: _inputs is a list of SimInput objects
+    #
+    # Attribute _input: the input being held
+    # Invariant: _input is one of _inputs
+    #
+    # Attribute _frame: the number of frames played
+    # Invariant: _frame is an int >= 0
+
+    def __init__(self,seed):
+        """
+        Initializes the player
+
+        Parameter seed: The seed of the key choices
+        Precondition: seed is an int
+        """
+        self._rng=random.Random(seed)
+        self._inputs=[SimInput(keys) for keys in BALANCE_KEYS]
+        self._input=self._inputs[0]
+        self._frame=0
+
+    def act(self,sim):
+        """
+        Returns the input for the next frame of sim
+
+        Parameter sim: The wave being played
+        Precondition: sim is a WaveSim
+        """
+        if self._frame % BALANCE_HOLD==0:
+            self._input=self._rng.choice(self._inputs)
+        self._frame+=1
+        return self._input
+
+
+class ScriptedPolicy(object):
+    """
+    A player that dodges alien bolts and otherwise aims at the nearest alien.
+
+    The target is the bottom alien of the column closest to the ship.
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _inputs: the input for each set of keys, by name
+    # Invariant: _inputs is a dictionary of SimInput objects
+
+    def __init__(self,seed):
+        """
+        Initializes the player
+
+        Parameter seed: Unused (the player makes no random choices)
+        Precondition: seed is an int
+        """
+        self._inputs={'left':SimInput(('left',)),'right':SimInput(('right',)),
+            'fire':SimInput(('up',)),'left fire':SimInput(('left','up')),
+            'right fire':SimInput(('right','up'))}
+
+    def act(self,sim):
+        """
+        Returns the input for the next frame of sim
+
+        Parameter sim: The wave being played
+        Precondition: sim is a WaveSim
+        """
+        x=sim.getShipX()
+        if x is None:
+            return self._inputs['fire']
+        #dodge any alien bolt coming down on the ship
+        for bolt in sim.getBolts():
+            if not bolt.isPlayerBolt() and bolt.y<SHIP_Y+BALANCE_DANGER and \
+                abs(bolt.x-x)<(SHIP_WIDTH+BOLT_WIDTH)/2+SHIP_MOVEMENT:
+                return self._inputs['left fire' if bolt.x>=x else 'right fire']
+        target=self._target(sim,x)
+        if target is None or abs(target-x)<=SHIP_MOVEMENT:
+            return self._inputs['fire']
+        return self._inputs['right' if target>x else 'left']
+
+    def _target(self,sim,x):
+        """
+        Returns the x-coordinate of the living column closest to x, or None
+
+        Parameter sim: The wave being played
+        Precondition: sim is a WaveSim
+
+        Parameter x: The x-coordinate of the ship
+        Precondition: x is a number (int or float)
+        """
+        origin=sim.getFormationOrigin()[0]
+        alive=sim.getAlive()
+        best=None
+        for column in range(sim.getColumns()):
+            rows=alive[:,column].nonzero()[0]
+            if len(rows)>0:
+                cx=origin+sim.getAlien(int(rows[-1]),column)[0]
+                if best is None or abs(cx-x)<abs(best-x):
+                    best=cx
+        return best
+
+
+def play_games(config,policy,seeds,maxSeconds=BALANCE_MAX_SECONDS):
+    """
+    Returns the results of playing one game of config per seed
+
+    The game runs at LOGIC_RATE updates a second of play (60 if LOGIC_RATE is
+    0). A new ship comes on as soon as the last one has exploded. A game
+    that is not over after maxSeconds of play counts as a loss.
+
+    The result is a list of tuples (won,updates,seconds) with whether the
+    player won, the number of updates, and the CPU time the game took.
+
+    Parameter config: The setting to play
+    Precondition: config is a BalanceConfig
+
+    Parameter policy: The name of the player
+    Precondition: policy is one of BALANCE_POLICIES
+
+    Parameter seeds: The seeds of the games
+    Precondition: seeds is a list of ints
+
+    Parameter maxSeconds: The longest game in seconds of play
+    Precondition: maxSeconds is a number > 0
+    """
+    rate=LOGIC_RATE if LOGIC_RATE>0 else 60
+    step=1.0/rate
+    limit=int(maxSeconds*rate)
+    kind=RandomPolicy if policy=='random' else ScriptedPolicy
+    results=[]
+    for seed in seeds:
+        start=time.process_time()
+        sim=config.newSim(seed)
+        player=kind(seed)
+        updates=0
+        while sim.hasPlayerWon() is None and updates<limit:
+            sim.update(player.act(sim),step)
+            updates+=1
+            if sim.isShipDestroyed():
+                if not sim.isLifeLeft():
+                    break
+                sim.createNewShip()
+                sim.resetShipDestroyed()
+        results.append((sim.hasPlayerWon()==True,updates,time.process_time()-start))
+    return results
+
+
+def sweep(configs,policy='random',games=100,workers=None,seed=0,maxSeconds=BALANCE_MAX_SECONDS):
+    """
+    Returns the results of playing games games of every config, by config
+
+    The result is a dictionary from each config to the list of its game
+    results (see play_games), in seed order.
+
+    Parameter configs: The settings to play
+    Precondition: configs is a list of BalanceConfig objects
+
+    Parameter policy: The name of the player
+    Precondition: policy is one of BALANCE_POLICIES
+
+    Parameter games: The number of games of each setting
+    Precondition: games is an int > 0
+
+    Parameter workers: The number of worker processes (None for one per core)
+    Precondition: workers is an int > 0, or None
+
+    Parameter seed: The seed of the first game of each setting
+    Precondition: seed is an int
+
+    Parameter maxSeconds: The longest game in seconds of play
+    Precondition: maxSeconds is a number > 0
+    """
+    assert policy in BALANCE_POLICIES
+    results={config:[None]*games for config in configs}
+    with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+        futures={}
+        for config in configs:
+            for first in range(0,games,BALANCE_CHUNK):
+                seeds=list(range(seed+first,seed+min(first+BALANCE_CHUNK,games)))
+                future=pool.submit(play_games,config,policy,seeds,maxSeconds)
+                futures[future]=(config,first)
+        for future in concurrent.futures.as_completed(futures):
+            config,first=futures[future]
+            chunk=future.result()
+            results[config][first:first+len(chunk)]=chunk
+    return results
+
+
+def report(results):
+    """
+    Returns the results of a sweep as a table, one line per setting
+
+    Parameter results: The results
+    Precondition: results is a dictionary returned by sweep
+    """
+    rate=LOGIC_RATE if LOGIC_RATE>0 else 60
+    lines=['%-44s %6s %9s %9s %10s' % ('setting','win %','mean s','max s','fps')]
+    for config,games in results.items():
+        wins=sum(1 for game in games if game[0])
+        updates=[game[1] for game in games]
+        cpu=sum(game[2] for game in games)
+        lines.append('%-44s %6.1f %9.1f %9.1f %10.0f' % (config.getName(),
+            100*wins/len(games),sum(updates)/len(games)/rate,max(updates)/rate,
+            sum(updates)/cpu if cpu>0 else 0))
+    return '\n'.join(lines)
+
+
+def _numbers(text,kind):
+    """
+    Returns the list of numbers in the comma separated text
+
+    Parameter text: The text
+    Precondition: text is a string of numbers separated by commas
+
+    Parameter kind: The type of the numbers
+    Precondition: kind is int or float
+    """
+    return [kind(part) for part in text.split(',')]
+
+
+# Run a sweep from the command line
+if __name__ == '__main__':
+    options=parse_options(sys.argv[1:])
+    sizes=[tuple(int(n) for n in size.split('x'))
+        for size in options.get('sizes','%dx%d' % (ALIEN_ROWS,ALIENS_IN_ROW)).split(',')]
+    configs=[BalanceConfig(rows,columns,speed,rate,boltSpeed,lives)
+        for (rows,columns),speed,rate,boltSpeed,lives in itertools.product(sizes,
+            _numbers(options.get('speeds',str(ALIEN_SPEED)),float),
+            _numbers(options.get('rates',str(BOLT_RATE)),int),
+            _numbers(options.get('bolt-speeds',str(BOLT_SPEED)),float),
+            _numbers(options.get('lives',str(SHIP_LIVES)),int))]
+    workers=int(options['workers']) if 'workers' in options else None
+    start=time.perf_counter()
+    results=sweep(configs,options.get('policy','random'),int(options.get('games',100)),
+        workers,int(options.get('seed',0)),float(options.get('max-seconds',BALANCE_MAX_SECONDS)))
+    print(report(results))
+    print('%d games in %.1fs' % (len(configs)*int(options.get('games',100)),
+        time.perf_counter()-start))
@@ -0,0 +1,393 @@
+"""
+Benchmark module for Alien Invaders
+
+This module times the parts of a wave that run every frame, over a grid of
+workloads: formation sizes, numbers of bolts on screen, alien speeds and
+bolt rates. For each workload it times
+
+    construction   building a new wave (create_aliens for a Wave)
+    update         one call to update
+    draw           one call to draw (Wave only)
+
+The headless WaveSim is always timed. The Kivy Wave is timed as well when
+Kivy can be imported, since that is the cost the player actually sees.
+
+The results are written to a JSON file. If a baseline file (the results of an
+earlier run) is given, every timing is compared to it, and any that is slower
+by more than the tolerance is reported. The script then exits with status 1,
+so it can gate a change.
+
+To run the benchmark from the command line, type
+
+    python benchmark.py --output=results.json --baseline=baseline.json
+
+Use --save-baseline to write the results to the baseline file instead, and
+--tolerance=0.2 to allow 20% slowdowns.
+
+Peter Ng'ang'a Wainaina pnw6
+Iman Kiio iwk4
+6th December 2021
+"""
+from consts import *
+from simulation import *
+from options import parse_options
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+
+# The formation sizes to benchmark, as (rows,columns)
+BENCH_SIZES = ((3,6),(5,12),(10,15))
+# The numbers of alien bolts to keep on screen
+BENCH_BOLTS = (0,16,64)
+# The alien speeds to benchmark
+BENCH_SPEEDS = (1.0,0.25)
+# The bolt rates to benchmark
+BENCH_RATES = (5,1)
+# The number of waves built to time construction
+BENCH_BUILDS = 100
+# The number of frames timed for update and draw
+BENCH_FRAMES = 600
+# The frame time of every update
+BENCH_DT = 1/60
+# The seed of the random number generators of every workload
+BENCH_SEED = 2021
+# The default allowed slowdown against the baseline (0.15 is 15% slower)
+BENCH_TOLERANCE = 0.15
+# The number of frames the ship moves in one direction before turning
+BENCH_SWEEP = 60
+
+
+class BenchCase(object):
+    """
+    A class representing one workload of the benchmark.
+
+    Attribute rows: the number of rows of aliens
+    Invariant: rows is an int > 0
+
+    Attribute columns: the number of aliens per row
+    Invariant: columns is an int > 0
+
+    Attribute bolts: the number of alien bolts kept on screen
+    Invariant: bolts is an int >= 0
+
+    Attribute speed: the number of seconds between alien steps
+    Invariant: speed is a float > 0
+
+    Attribute rate: the most alien steps between alien bolts
+    Invariant: rate is an int > 0
+    """
+
+    def getName(self):
+        """
+        Returns the name of this workload in the results
+        """
+        return '%dx%d/bolts=%d/speed=%s/rate=%d' % (self.rows,self.columns,
+            self.bolts,self.speed,self.rate)
+
+    def __init__(self,rows,columns,bolts,speed,rate):
+        """
+        Initializes a workload
+
+        Parameter rows: The number of rows of aliens
+        Precondition: rows is an int > 0
+
+        Parameter columns: The number of aliens per row
+        Precondition: columns is an int > 0
+
+        Parameter bolts: The number of alien bolts kept on screen
+        Precondition: bolts is an int >= 0
+
+        Parameter speed: The number of seconds between alien steps
+        Precondition: speed is a float > 0
+
+        Parameter rate: The most alien steps between alien bolts
+        Precondition: rate is an int > 0
+        """
+        assert isinstance(bolts,int) and bolts>=0
+        self.rows=rows
+        self.columns=columns
+        self.bolts=bolts
+        self.speed=speed
+        self.rate=rate
+
+    def newSim(self):
+        """
+        Returns a new WaveSim for this workload, with a seeded generator
+        """
+        return WaveSim(random.Random(BENCH_SEED),self.rows,self.columns,
+            self.speed,self.rate)
+
+
+def all_cases():
+    """
+    Returns a list of every workload in the benchmark grid
+    """
+    return [BenchCase(rows,columns,bolts,speed,rate)
+        for rows,columns in BENCH_SIZES for bolts in BENCH_BOLTS
+        for speed in BENCH_SPEEDS for rate in BENCH_RATES]
+
+
+def summarize(times):
+    """
+    Returns a dictionary of statistics for a list of timings, in microseconds
+
+    Parameter times: The timings in seconds
+    Precondition: times is a non-empty list of floats
+    """
+    times=sorted(times)
+    return {'median':statistics.median(times)*1e6,
+        'p95':times[min(len(times)-1,int(0.95*len(times)))]*1e6,
+        'mean':statistics.fmean(times)*1e6}
+
+
+def top_up(sim,bolts,rng):
+    """
+    Adds alien bolts to sim until it has bolts of them on screen
+
+    The new bolts are spread at random over the top half of the screen.
+
+    Parameter sim: The wave to add the bolts to
+    Precondition: sim is a WaveSim
+
+    Parameter bolts: The number of alien bolts wanted
+    Precondition: bolts is an int >= 0
+
+    Parameter rng: The generator used to place the bolts
+    Precondition: rng is a random.Random object
+    """
+    store=sim.getBolts()
+    for _ in range(bolts-(len(store)-store.playerCount())):
+        sim.addBolt(rng.uniform(BOLT_WIDTH,GAME_WIDTH-BOLT_WIDTH),
+            rng.uniform(GAME_HEIGHT/2,GAME_HEIGHT),-BOLT_SPEED)
+
+
+def sweep_keys(frame):
+    """
+    Returns the keys held down at frame by the benchmark player
+
+    The player holds fire, and sweeps the ship from side to side.
+
+    Parameter frame: The frame number
+    Precondition: frame is an int >= 0
+    """
+    return ('left','up') if (frame//BENCH_SWEEP)%2==0 else ('right','up')
+
+
+def play(case,sim,update,recover,draw=None):
+    """
+    Returns the timings of BENCH_FRAMES frames of sim, as (update,draw) lists
+
+    The benchmark player (see sweep_keys) plays the wave. Bolts are topped up
+    before every frame, and a lost ship or a finished wave is replaced, so that
+    every frame has the workload of case. Only the calls to update and draw
+    are timed.
+
+    Parameter case: The workload
+    Precondition: case is a BenchCase
+
+    Parameter sim: The wave to play
+    Precondition: sim is a new WaveSim for case
+
+    Parameter update: The function to update the wave for a frame
+    Precondition: update is a function taking the frame number
+
+    Parameter recover: The function to replace a lost ship or finished wave
+    Precondition: recover is a function of no arguments returning the WaveSim
+    being played (which is a new one if the wave was replaced)
+
+    Parameter draw: The function to draw the wave, or None
+    Precondition: draw is a function of no arguments, or None
+    """
+    rng=random.Random(BENCH_SEED)
+    clock=time.perf_counter
+    updates=[]
+    draws=[]
+    for frame in range(BENCH_FRAMES):
+        top_up(sim,case.bolts,rng)
+        start=clock()
+        update(frame)
+        updates.append(clock()-start)
+        if not draw is None:
+            start=clock()
+            draw()
+            draws.append(clock()-start)
+        sim=recover()
+    return updates,draws
+
+
+def bench_sim(case):
+    """
+    Returns the timings of the headless WaveSim for case, as a dictionary
+
+    Parameter case: The workload
+    Precondition: case is a BenchCase
+    """
+    clock=time.perf_counter
+    builds=[]
+    for _ in range(BENCH_BUILDS):
+        start=clock()
+        case.newSim()
+        builds.append(clock()-start)
+
+    inputs=[SimInput(sweep_keys(0)),SimInput(sweep_keys(BENCH_SWEEP))]
+    state={'sim':case.newSim()}
+    def update(frame):
+        state['sim'].update(inputs[(frame//BENCH_SWEEP)%2],BENCH_DT)
+    def recover():
+        sim=state['sim']
+        if not sim.hasPlayerWon() is None:
+            state['sim']=sim=case.newSim()
+        elif sim.isShipDestroyed():
+            sim.createNewShip()
+            sim.resetShipDestroyed()
+        return sim
+    updates,_=play(case,state['sim'],update,recover)
+    return {'construction':summarize(builds),'update':summarize(updates)}
+
+
+def bench_wave(case,view):
+    """
+    Returns the timings of the Kivy Wave for case, as a dictionary
+
+    Parameter case: The workload
+    Precondition: case is a BenchCase
+
+    Parameter view: The view to draw on
+    Precondition: view is a GView
+    """
+    from wave import Wave
+    clock=time.perf_counter
+    builds=[]
+    for _ in range(BENCH_BUILDS):
+        sim=case.newSim()
+        start=clock()
+        Wave(sim=sim)
+        builds.append(clock()-start)
+
+    inputs=[SimInput(sweep_keys(0)),SimInput(sweep_keys(BENCH_SWEEP))]
+    sim=case.newSim()
+    state={'sim':sim,'wave':Wave(sim=sim)}
+    def update(frame):
+        state['wave'].update(inputs[(frame//BENCH_SWEEP)%2],BENCH_DT)
+    def recover():
+        sim=state['sim']
+        if not sim.hasPlayerWon() is None:
+            state['sim']=sim=case.newSim()
+            state['wave']=Wave(sim=sim)
+        elif sim.isShipDestroyed():
+            state['wave'].createNewShip()
+            state['wave'].resetShipDestroyed()
+        return sim
+    def draw():
+        view.clear()
+        state['wave'].draw(view)
+    updates,draws=play(case,sim,update,recover,draw)
+    return {'construction':summarize(builds),'update':summarize(updates),
+        'draw':summarize(draws)}
+
+
+def kivy_view():
+    """
+    Returns a GView to draw waves on, or None if Kivy is not available
+
+    This also points the game2d resources at this directory, as GameApp does
+    when the game starts.
+    """
+    try:
+        import kivy.resources
+        from game2d import GameApp, GView
+    except ImportError:
+        return None
+    path=os.path.dirname(os.path.abspath(__file__))
+    GameApp.fonts=os.path.join(path,'Fonts')
+    GameApp.sounds=os.path.join(path,'Sounds')
+    GameApp.images=os.path.join(path,'Images')
+    for folder in (GameApp.fonts,GameApp.sounds,GameApp.images):
+        kivy.resources.resource_add_path(folder)
+    return GView()
+
+
+def run(cases,kivy=True,log=None):
+    """
+    Returns the results of benchmarking cases, as a dictionary
+
+    Parameter cases: The workloads
+    Precondition: cases is a list of BenchCase objects
+
+    Parameter kivy: Whether to benchmark the Kivy Wave (if Kivy is available)
+    Precondition: kivy is a bool
+
+    Parameter log: The file to report progress to, or None for no report
+    Precondition: log is a text file open for writing, or None
+    """
+    view=kivy_view() if kivy else None
+    results={'python':platform.python_version(),'machine':platform.machine(),
+        'frames':BENCH_FRAMES,'builds':BENCH_BUILDS,'cases':{}}
+    for case in cases:
+        name=case.getName()
+        entry={'sim':bench_sim(case)}
+        if not view is None:
+            entry['wave']=bench_wave(case,view)
+        results['cases'][name]=entry
+        if not log is None:
+            log.write('%-36s sim update %8.1fus\n' % (name,entry['sim']['update']['median']))
+    return results
+
+
+def compare(results,baseline,tolerance=BENCH_TOLERANCE):
+    """
+    Returns a list of the timings in results slower than in baseline
+
+    Each slowdown is a tuple (case,target,metric,baseline,result) of the case
+    name, 'sim' or 'wave', the metric name, and the two median times. Timings
+    missing from either side are skipped.
+
+    Parameter results: The new results
+    Precondition: results is a dictionary returned by run
+
+    Parameter baseline: The results to compare against
+    Precondition: baseline is a dictionary returned by run
+
+    Parameter tolerance: The allowed slowdown (0.15 is 15% slower)
+    Precondition: tolerance is a number >= 0
+    """
+    slower=[]
+    for name,entry in results['cases'].items():
+        old=baseline['cases'].get(name,{})
+        for target,metrics in entry.items():
+            for metric,stats in metrics.items():
+                if target in old and metric in old[target]:
+                    before=old[target][metric]['median']
+                    if stats['median']>before*(1+tolerance):
+                        slower.append((name,target,metric,before,stats['median']))
+    return slower
+
+
+# Run the benchmark from the command line
+if __name__ == '__main__':
+    options=parse_options(sys.argv[1:])
+    output=options.get('output','benchmark.json')
+    basefile=options.get('baseline','benchmark-baseline.json')
+    tolerance=float(options.get('tolerance',BENCH_TOLERANCE))
+    results=run(all_cases(),not options.get('sim-only',False),sys.stdout)
+    with open(output,'w') as file:
+        json.dump(results,file,indent=1,sort_keys=True)
+    print('results written to',output)
+
+    if options.get('save-baseline',False):
+        with open(basefile,'w') as file:
+            json.dump(results,file,indent=1,sort_keys=True)
+        print('baseline written to',basefile)
+    elif os.path.exists(basefile):
+        with open(basefile) as file:
+            slower=compare(results,json.load(file),tolerance)
+        for name,target,metric,before,after in slower:
+            print('SLOWER %s %s %s: %.1fus -> %.1fus (%+.0f%%)' % (name,target,
+                metric,before,after,100*(after/before-1)))
+        if slower:
+            sys.exit(1)
+        print('no slowdowns over %.0f%% against %s' % (100*tolerance,basefile))
@@ -128,6 +128,12 @@ except:
 
 #Ship Sprite Location
 SHIP_IMAGE="ship-strip.png"
+#rows and columns of the ship sprite
+SHIP_FORMAT=(2,3)
+#number of frames in the ship sprite
+SHIP_FRAMES=SHIP_FORMAT[0]*SHIP_FORMAT[1]
+#y-coordinate of the ship center
+SHIP_Y=SHIP_BOTTOM+(0.5*SHIP_HEIGHT)
 #Time ship takes to explode
 DEATH_SPEED=0.4
 #distance from ceiling to message displays in active state
@@ -136,3 +142,48 @@ MESSAGE_HEIGHT=50
 MESSAGE_WIDTH=100
 #state after STATE_COMPLETE as new game is being started
 STATE_NEWGAME=6
+#event for a player bolt killing an alien
+EVENT_KILL=0
+#event for an alien bolt destroying the ship
+EVENT_SHIP_HIT=1
+#event for a bolt being fired
+EVENT_FIRE=2
+#number of logic steps per second in fixed-timestep mode, or 0 to update the
+#wave once per frame with the frame time
+LOGIC_RATE=60
+#most logic steps to run in one frame, so a slow frame cannot snowball
+MAX_LOGIC_STEPS=5
+#directory to record the input of every wave into (see replay.py), or None
+INPUT_LOG_DIR=None
+#number of spare bolts of each kind (player and alien) kept for reuse
+BOLT_POOL_SIZE=16
+#number of frames kept by the wave phase profiler (see profiler.py), or 0 for no profiling
+PROFILE_FRAMES=0
+#key that shows and hides the frame-time overlay (see hud.py)
+HUD_KEY='f'
+#number of recent frames summarized by the frame-time overlay
+HUD_FRAMES=240
+#seconds between refreshes of the frame-time overlay text and histogram
+HUD_REFRESH=0.5
+#number of bars in the frame-time histogram (the last bar counts every slower frame)
+HUD_BINS=20
+#frame time covered by each bar of the frame-time histogram, in seconds
+HUD_BIN_WIDTH=0.002
+#height in pixels of a histogram bar holding every frame
+HUD_BAR_HEIGHT=80
+#file to stream frame timings, state changes, wave events and profiles to (see telemetry.py), or None
+TELEMETRY_PATH=None
+#most telemetry records waiting to be written before new ones are dropped
+TELEMETRY_QUEUE=4096
+#seconds of play kept for rewinding a wave (see rewind.py)
+REWIND_SECONDS=10
+#frames from one whole (keyframe) snapshot to the next in the rewind history
+REWIND_KEYFRAME=30
+#key that rewinds the wave being played (such as 'r'), or None to keep no rewind history
+REWIND_KEY=None
+#seconds the wave goes back each time REWIND_KEY is pressed
+REWIND_JUMP=2
+#distance between the centers of neighboring aliens in a row
+ALIEN_PITCH_X=ALIEN_H_SEP+ALIEN_WIDTH
+#distance between the centers of neighboring aliens in a column
+ALIEN_PITCH_Y=ALIEN_V_SEP+ALIEN_HEIGHT
@@ -0,0 +1,114 @@
+"""
+Divergence finder for Alien Invaders
+
+This module replays an input log (see replay.py) twice and compares the
+rolling state hash (see WaveSim.getStateHash) after every wave update. A
+wave must play out the same way every time it is given the same seed and
+input. If the two runs part ways, this reports the first update where they
+differ, and the state of the wave in each run at that point.
+
+The runs can be in the same process, or in two separate processes. Two
+processes catch differences that one process cannot, such as anything that
+depends on the order of a set of strings (which Python changes from one
+process to the next).
+
+To check a log from the command line, type
+
+    python divergence.py wave.inp
+
+and add --processes to play the two runs in separate processes.
+
+Peter Ng'ang'a Wainaina pnw6
+Iman Kiio iwk4
+6th December 2021
+"""
+from consts import *
+from replay import InputLog, ReplayPlayer
+import multiprocessing
+import sys
+
+
+def trace(path):
+    """
+    Returns the rolling hash after every update of replaying the log at path
+
+    The result is a list with one tuple (frame,hash,summary) per update,
+    where frame is the frame of the log, hash is the rolling hash, and summary
+    is a tuple (score,lives,ship x,formation origin,number of bolts) for
+    reporting.
+
+    Parameter path: The name of the log file
+    Precondition: path is a string naming a log written by InputRecorder
+    """
+    steps=[]
+    last=[0]
+    def observe(frame,sim):
+        last[0]=sim.getStateHash(last[0])
+        steps.append((frame,last[0],(sim.getScore(),sim.getLives(),sim.getShipX(),
+            sim.getFormationOrigin(),len(sim.getBolts()))))
+    ReplayPlayer(InputLog(path)).run(observe)
+    return steps
+
+
+def find_divergence(first,second):
+    """
+    Returns the index of the first update where two traces differ
+
+    The result is None if the traces are the same. If one trace is a prefix
+    of the other, the result is the length of the shorter one.
+
+    Parameter first: The first trace
+    Precondition: first is a list returned by trace
+
+    Parameter second: The second trace
+    Precondition: second is a list returned by trace
+    """
+    for index in range(min(len(first),len(second))):
+        if first[index][1]!=second[index][1]:
+            return index
+    if len(first)!=len(second):
+        return min(len(first),len(second))
+    return None
+
+
+def compare(path,processes=False):
+    """
+    Replays the log at path twice, and returns a report of the comparison
+
+    Parameter path: The name of the log file
+    Precondition: path is a string naming a log written by InputRecorder
+
+    Parameter processes: Whether to play the two runs in separate processes
+    Precondition: processes is a bool
+    """
+    if processes:
+        #spawn, so that each run starts from a fresh interpreter
+        context=multiprocessing.get_context('spawn')
+        with context.Pool(2) as pool:
+            first,second=pool.map(trace,[path,path])
+    else:
+        first=trace(path)
+        second=trace(path)
+
+    index=find_divergence(first,second)
+    if index is None:
+        return 'no divergence in %d updates (final hash %08x)' % (len(first),
+            first[-1][1] if first else 0)
+    lines=['first divergence at update %d' % index]
+    for name,steps in (('run 1',first),('run 2',second)):
+        if index<len(steps):
+            frame,value,summary=steps[index]
+            lines.append('%s: frame %d hash %08x score %d lives %d ship %s origin %s bolts %d'
+                % ((name,frame,value)+summary))
+        else:
+            lines.append('%s: ended after %d updates' % (name,len(steps)))
+    return '\n'.join(lines)
+
+
+# Check a log from the command line
+if __name__ == '__main__':
+    paths=[arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    report=compare(paths[-1],'--processes' in sys.argv)
+    print(report)
+    if not report.startswith('no divergence'):
+        sys.exit(1)
@@ -0,0 +1,210 @@
+"""
+Training environment module for Alien Invaders
+
+This module wraps a headless WaveSim (see simulation.py) in the interface
+used by reinforcement learning libraries in the style of OpenAI Gym:
+
+    obs=env.reset(seed)
+    obs,reward,done,info=env.step(action)
+
+The action is one of ENV_NOOP, ENV_LEFT, ENV_RIGHT and ENV_FIRE. The reward
+is the change in the score, and the episode is done when the wave is won or
+lost. One step is one wave update at LOGIC_RATE (60 a second if that is 0).
+
+When the ship is hit, the whole explosion is played out inside that one
+step, and a new ship is brought on (if there is a life left) before the step
+returns. The rules are not changed (the aliens keep marching while the ship
+explodes), but the agent never has to act through the animation.
+
+The observation is a flat float32 vector (see InvadersEnv.observe), or, if
+the environment is made with raster=True, a grid of uint8 labels drawn by
+WaveRaster (see raster.py). Either way it is written into the same array
+every step, so copy it if it must be kept.
+
+Peter Ng'ang'a Wainaina pnw6
+Iman Kiio iwk4
+6th December 2021
+"""
+from consts import *
+from simulation import *
+from raster import WaveRaster
+import numpy as np
+import random
+
+# The actions
+ENV_NOOP = 0
+ENV_LEFT = 1
+ENV_RIGHT = 2
+ENV_FIRE = 3
+# The keys held down for each action
+ENV_KEYS = ((),('left',),('right',),('up',))
+# The number of alien bolts in an observation (the lowest ones)
+ENV_ALIEN_BOLTS = 8
+# The most steps in an episode before it is cut off
+ENV_MAX_STEPS = 60*60*10
+
+
+class InvadersEnv(object):
+    """
+    A class to train computer players on a single wave.
+
+    Attribute action_count: the number of actions
+    Invariant: action_count is an int, 4
+
+    Attribute observation_shape: the shape of an observation
+    Invariant: observation_shape is a tuple of ints > 0
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _settings: the settings for each new WaveSim
+    # Invariant: _settings is a dictionary of WaveSim keyword arguments
+    #
+    # Attribute _sim: the wave being played
+    # Invariant: _sim is a WaveSim, or None before the first reset
+    #
+    # Attribute _inputs: the input for each action
+    # Invariant: _inputs is a tuple of SimInput objects, indexed by action
+    #
+    # Attribute _step: the length of a wave update, in seconds
+    # Invariant: _step is a float > 0
+    #
+    # Attribute _steps: the number of steps in this episode
+    # Invariant: _steps is an int >= 0
+    #
+    # Attribute _score: the score after the last step
+    # Invariant: _score is an int >= 0
+    #
+    # Attribute _obs: the feature observation, rewritten every step
+    # Invariant: _obs is a numpy array of float32 of shape observation_shape,
+    # or None if _raster is used
+    #
+    # Attribute _raster: the rasterizer of grid observations
+    # Invariant: _raster is a WaveRaster, or None for feature observations
+    #
+    # Attribute _maxSteps: the most steps in an episode
+    # Invariant: _maxSteps is an int > 0
+
+    def __init__(self,maxSteps=ENV_MAX_STEPS,raster=False,**settings):
+        """
+        Initializes an environment (call reset before the first step)
+
+        Parameter maxSteps: The most steps in an episode before it is cut off
+        Precondition: maxSteps is an int > 0
+
+        Parameter raster: Whether observations are grids instead of features
+        Precondition: raster is a bool
+
+        Parameter settings: The settings of the wave, as for WaveSim (rows,
+        columns, alienSpeed, boltRate, boltSpeed, lives)
+        """
+        assert isinstance(maxSteps,int) and maxSteps>0
+        self._settings=settings
+        self._maxSteps=maxSteps
+        self._sim=None
+        self._inputs=tuple(SimInput(keys) for keys in ENV_KEYS)
+        self._step=1.0/(LOGIC_RATE if LOGIC_RATE>0 else 60)
+        self._steps=0
+        self._score=0
+        self.action_count=len(ENV_KEYS)
+        if raster:
+            self._raster=WaveRaster()
+            self._obs=None
+            self.observation_shape=(self._raster.height,self._raster.width)
+        else:
+            rows=settings.get('rows',ALIEN_ROWS)
+            columns=settings.get('columns',ALIENS_IN_ROW)
+            self._raster=None
+            self._obs=np.zeros(6+2*ENV_ALIEN_BOLTS+rows*columns,dtype=np.float32)
+            self.observation_shape=self._obs.shape
+
+    def getWave(self):
+        """
+        Returns the WaveSim being played, or None before the first reset
+        """
+        return self._sim
+
+    def reset(self,seed=None):
+        """
+        Starts a new episode, and returns the first observation
+
+        Parameter seed: The seed of the random number generator of the wave
+        Precondition: seed is an int, or None for a seed from the operating system
+        """
+        self._sim=WaveSim(random.Random(seed),**self._settings)
+        self._steps=0
+        self._score=0
+        return self.observe()
+
+    def step(self,action):
+        """
+        Plays one step, and returns a tuple (obs,reward,done,info)
+
+        The info is a dictionary with the score, the lives left, whether the
+        wave was won (True, False or None), and whether the episode was cut off
+        at the step limit ('truncated').
+
+        Parameter action: The action
+        Precondition: action is one of ENV_NOOP, ENV_LEFT, ENV_RIGHT, ENV_FIRE
+        """
+        assert not self._sim is None, 'reset must be called first'
+        sim=self._sim
+        sim.update(self._inputs[action],self._step)
+        #play out the explosion, so that a ship is hit and replaced in one step
+        if (EVENT_SHIP_HIT,) in sim.getEvents():
+            noop=self._inputs[ENV_NOOP]
+            while not sim.isShipDestroyed() and sim.hasPlayerWon() is None:
+                sim.update(noop,self._step)
+            if sim.isLifeLeft() and sim.hasPlayerWon() is None:
+                sim.createNewShip()
+                sim.resetShipDestroyed()
+        self._steps+=1
+
+        score=sim.getScore()
+        reward=score-self._score
+        self._score=score
+        won=sim.hasPlayerWon()
+        truncated=won is None and self._steps>=self._maxSteps
+        done=not won is None or sim.getLives()==0 or truncated
+        info={'score':score,'lives':sim.getLives(),'won':won,'truncated':truncated}
+        return self.observe(),reward,done,info
+
+    def observe(self):
+        """
+        Returns the observation of the current wave
+
+        With raster observations, this is the grid drawn by WaveRaster.
+        Otherwise it is a float32 vector. Positions are divided by the size
+        of the window, and anything missing is -1:
+            0     ship x
+            1,2   formation origin x and y
+            3     lives left, as a fraction of the starting lives
+            4,5   player bolt x and y
+            6..   x and y of the ENV_ALIEN_BOLTS lowest alien bolts
+            then  the alive mask of the aliens, row by row (1 alive, 0 dead)
+
+        The array is reused by every call.
+        """
+        sim=self._sim
+        if not self._raster is None:
+            return self._raster.draw(sim)
+        obs=self._obs
+        obs[:6+2*ENV_ALIEN_BOLTS]=-1
+        x=sim.getShipX()
+        if not x is None:
+            obs[0]=x/GAME_WIDTH
+        origin=sim.getFormationOrigin()
+        obs[1]=origin[0]/GAME_WIDTH
+        obs[2]=origin[1]/GAME_HEIGHT
+        obs[3]=sim.getLives()/self._settings.get('lives',SHIP_LIVES)
+        alien=[]
+        for bolt in sim.getBolts():
+            if bolt.isPlayerBolt():
+                obs[4]=bolt.x/GAME_WIDTH
+                obs[5]=bolt.y/GAME_HEIGHT
+            else:
+                alien.append((bolt.y,bolt.x))
+        alien.sort()
+        for index,(y,x) in enumerate(alien[:ENV_ALIEN_BOLTS]):
+            obs[6+2*index]=x/GAME_WIDTH
+            obs[7+2*index]=y/GAME_HEIGHT
+        obs[6+2*ENV_ALIEN_BOLTS:]=sim.getAlive().ravel()
+        return obs
@@ -325,6 +325,22 @@ class GView(FloatLayout):
     See the documentation of that class for more information.
     """
 
+    # IMMUTABLE ATTRIBUTES
+    @property
+    def draw_count(self):
+        """
+        The number of graphics commands drawn to this view since it was last cleared.
+
+        Each :class:`GObject` drawn counts once, no matter how many shapes it contains.
+        This attribute is primarily for measuring performance.
+
+        **Immutable**: This value cannot be altered.
+
+        **Invariant**: Must be an int >= 0.
+        """
+        return len(self._contents)
+
+
     # BUILT-IN METHODS
     def __init__(self):
         """
@@ -0,0 +1,199 @@
+"""
+Frame-time overlay module for Alien Invaders
+
+This module measures every frame of the game and draws an overlay with the
+results: the time spent in update and in draw, the number of graphics
+commands the view drew, and a histogram of recent frame times with its
+p50, p95 and p99.
+
+The overlay is cheap enough to leave in the game. Recording a frame only
+stores a few numbers. The text and the histogram bars are only rebuilt every
+HUD_REFRESH seconds, and only while the overlay is shown. Press HUD_KEY to
+show or hide it.
+
+Peter Ng'ang'a Wainaina pnw6
+Iman Kiio iwk4
+6th December 2021
+"""
+from consts import *
+from game2d import *
+
+# The color of the overlay text and bars
+HUD_COLOR = (0.0,0.6,0.0,1.0)
+# The left edge of the overlay
+HUD_LEFT = 10
+# The bottom of the histogram bars
+HUD_BOTTOM = GAME_HEIGHT/2
+# The width of a histogram bar
+HUD_BAR_WIDTH = 6
+
+
+class FrameHud(object):
+    """
+    A class to measure frames and draw the frame-time overlay.
+
+    Call record once per frame with the measurements of that frame, and
+    draw at the end of the frame (after everything else has been drawn).
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _frames: the frame times of the last HUD_FRAMES frames
+    # Invariant: _frames is a list of HUD_FRAMES floats, in seconds. Only the
+    # first min(_count,HUD_FRAMES) are frame times; frame _count-1 is at
+    # (_count-1) % HUD_FRAMES.
+    #
+    # Attribute _count: the number of frames recorded
+    # Invariant: _count is an int >= 0
+    #
+    # Attribute _update: the update time of the frames since the last refresh
+    # Invariant: _update is a float >= 0, in seconds
+    #
+    # Attribute _draw: the draw time of the frames since the last refresh
+    # Invariant: _draw is a float >= 0, in seconds
+    #
+    # Attribute _window: the number of frames since the last refresh
+    # Invariant: _window is an int >= 0
+    #
+    # Attribute _elapsed: the time since the last refresh
+    # Invariant: _elapsed is a float >= 0, in seconds
+    #
+    # Attribute _commands: the number of commands drawn in the last frame
+    # Invariant: _commands is an int >= 0
+    #
+    # Attribute _visible: whether the overlay is shown
+    # Invariant: _visible is a bool
+    #
+    # Attribute _keyDown: whether HUD_KEY was held down in the last frame
+    # Invariant: _keyDown is a bool
+    #
+    # Attribute _label: the overlay text
+    # Invariant: _label is a GLabel, or None until the first refresh
+    #
+    # Attribute _bars: the histogram bars, shortest frame times first
+    # Invariant: _bars is a list of HUD_BINS GRectangle objects, or None until
+    # the first refresh
+
+    def isVisible(self):
+        """
+        Returns True if the overlay is shown
+        """
+        return self._visible
+
+    def __init__(self):
+        """
+        Initializes a hidden overlay with no frames recorded
+        """
+        self._frames=[0.0]*HUD_FRAMES
+        self._count=0
+        self._update=0.0
+        self._draw=0.0
+        self._window=0
+        self._elapsed=0.0
+        self._commands=0
+        self._visible=False
+        self._keyDown=False
+        self._label=None
+        self._bars=None
+
+    def toggle(self,input):
+        """
+        Shows or hides the overlay when HUD_KEY is pressed
+
+        The overlay changes once per press, not once per frame the key is held.
+
+        Parameter input: The input from the User
+        Precondition: input is a GInput
+        """
+        down=input.is_key_down(HUD_KEY)
+        if down and not self._keyDown:
+            self._visible=not self._visible
+            self._elapsed=HUD_REFRESH
+        self._keyDown=down
+
+    def record(self,dt,update,draw,commands):
+        """
+        Records the measurements of one frame
+
+        Parameter dt: The time in seconds since the last frame
+        Precondition: dt is a number (int or float) >= 0
+
+        Parameter update: The time in seconds spent updating the game
+        Precondition: update is a float >= 0
+
+        Parameter draw: The time in seconds spent drawing the game
+        Precondition: draw is a float >= 0
+
+        Parameter commands: The number of graphics commands drawn
+        Precondition: commands is an int >= 0
+        """
+        self._frames[self._count % HUD_FRAMES]=dt
+        self._count+=1
+        self._update+=update
+        self._draw+=draw
+        self._window+=1
+        self._elapsed+=dt
+        self._commands=commands
+        if self._visible and self._elapsed>=HUD_REFRESH:
+            self._refresh()
+
+    def draw(self,view):
+        """
+        Draws the overlay to the view, if it is shown
+
+        Parameter view: The view on which to draw the overlay
+        Precondition: view must be an instance of GView
+        """
+        if self._visible and not self._label is None:
+            self._label.draw(view)
+            for bar in self._bars:
+                bar.draw(view)
+
+    # HELPER METHODS
+    def _refresh(self):
+        """
+        Rebuilds the overlay text and histogram from the recorded frames
+
+        The update and draw times are the averages since the last refresh.
+        """
+        frames=sorted(self._frames[:min(self._count,HUD_FRAMES)])
+        window=max(self._window,1)
+        text=('update %.2f ms  draw %.2f ms  commands %d\nframe p50 %.1f  p95 %.1f  p99 %.1f ms'
+            % (1000*self._update/window,1000*self._draw/window,self._commands,
+            1000*_percentile(frames,50),1000*_percentile(frames,95),1000*_percentile(frames,99)))
+        if self._label is None:
+            self._label=GLabel(text=text,linecolor=HUD_COLOR,font_size=14,halign='left')
+        else:
+            self._label.text=text
+        self._label.left=HUD_LEFT
+        self._label.bottom=HUD_BOTTOM+HUD_BAR_HEIGHT+10
+
+        counts=[0]*HUD_BINS
+        for dt in frames:
+            counts[min(int(dt/HUD_BIN_WIDTH),HUD_BINS-1)]+=1
+        if self._bars is None:
+            self._bars=[GRectangle(width=HUD_BAR_WIDTH,height=1,fillcolor=HUD_COLOR,
+                linecolor=HUD_COLOR) for _ in range(HUD_BINS)]
+        for index,bar in enumerate(self._bars):
+            bar.height=max(1,HUD_BAR_HEIGHT*counts[index]/max(len(frames),1))
+            bar.left=HUD_LEFT+index*(HUD_BAR_WIDTH+2)
+            bar.bottom=HUD_BOTTOM
+
+        self._update=0.0
+        self._draw=0.0
+        self._window=0
+        self._elapsed=0.0
+
+
+def _percentile(values,percent):
+    """
+    Returns the value at percent of the way through values
+
+    Parameter values: The values
+    Precondition: values is a sorted list of numbers, possibly empty (which
+    gives 0)
+
+    Parameter percent: The percentile
+    Precondition: percent is a number in 0..100
+    """
+    if len(values)==0:
+        return 0
+    return values[min(len(values)-1,int(percent/100*len(values)))]
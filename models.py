@@ -99,7 +99,7 @@ class Ship(GSprite):
         assert isinstance(x_c,float) or isinstance(x_c,int) and x_c>=0 and x_c<=GAME_WIDTH
         assert isinstance(y_c,float) or isinstance(y_c,int) and y_c>=0 and y_c<=GAME_HEIGHT
 
-        super().__init__(width=SHIP_WIDTH,height=SHIP_HEIGHT,x=x_c,y=y_c,source=SHIP_IMAGE,format=(2,3))
+        super().__init__(width=SHIP_WIDTH,height=SHIP_HEIGHT,x=x_c,y=y_c,source=SHIP_IMAGE,format=SHIP_FORMAT)
 
     # METHODS TO MOVE THE SHIP AND CHECK FOR COLLISIONS
     def collides(self,bolt):
@@ -269,6 +269,97 @@ class Bolt(GRectangle):
 
 
     # ADD MORE METHODS (PROPERLY SPECIFIED) AS NECESSARY
+    def refire(self,x_c,y_c,v):
+        """
+        Moves this bolt to a new position with a new velocity, reusing its drawing
+
+        The new velocity must be in the same direction as the old one, so that
+        the color (and the Kivy instructions behind it) does not change.
+
+        Parameter x_c:The x-coordinate to center the  middle  of the bolt image in the Game Window
+        Precondition:x_c must be a number (int or float)
+
+        Parameter y_c:The y-coordinate to center the  middle  of the bolt image in the Game Window
+        Precondition:y_c must be a number (int or float)
+
+        Parameter:v The velocity of the bolt
+        Precondition: v is an number(int or float) with the same sign as getVelocity()
+        """
+        assert isinstance(x_c,float) or isinstance(x_c,int)
+        assert isinstance(y_c,float) or isinstance(y_c,int)
+        assert (isinstance(v,int) or isinstance(v,float)) and (v>0)==self.isPlayerBolt()
+        self.x=x_c
+        self.y=y_c
+        self._velocity=v
 
 
 # IF YOU NEED ADDITIONAL MODEL CLASSES, THEY GO HERE
+class BoltPool(object):
+    """
+    A class to recycle Bolt objects instead of making a new one for every shot.
+
+    Every Bolt carries its own Kivy instructions (an InstructionGroup, the
+    transforms, a Color and a Rectangle). Making one per shot and dropping it
+    when it leaves the screen leaves a lot of work for the garbage collector.
+    A pool keeps spent bolts, instructions and all, and hands them out again
+    the next time a bolt of the same kind is fired.
+
+    The pool keeps player and alien bolts apart, so a recycled bolt never has
+    to change color. It makes capacity bolts of each kind up front and never
+    keeps more than that many spare, so its memory use is fixed.
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _capacity: the most spare bolts of each kind to keep
+    # Invariant: _capacity is an int > 0
+    #
+    # Attribute _player: the spare player bolts
+    # Invariant: _player is a list of at most _capacity player Bolts
+    #
+    # Attribute _alien: the spare alien bolts
+    # Invariant: _alien is a list of at most _capacity alien Bolts
+
+    def __init__(self,capacity=BOLT_POOL_SIZE):
+        """
+        Initializes a pool with capacity spare bolts of each kind
+
+        Parameter capacity: The most spare bolts of each kind to keep
+        Precondition: capacity is an int > 0
+        """
+        assert isinstance(capacity,int) and capacity>0
+        self._capacity=capacity
+        self._player=[Bolt(0,0,BOLT_SPEED) for _ in range(capacity)]
+        self._alien=[Bolt(0,0,-BOLT_SPEED) for _ in range(capacity)]
+
+    def acquire(self,x_c,y_c,v):
+        """
+        Returns a Bolt at the given position and velocity, reusing a spare one if possible
+
+        Parameter x_c:The x-coordinate to center the  middle  of the bolt image in the Game Window
+        Precondition:x_c must be a number (int or float)
+
+        Parameter y_c:The y-coordinate to center the  middle  of the bolt image in the Game Window
+        Precondition:y_c must be a number (int or float)
+
+        Parameter:v The velocity of the bolt
+        Precondition: v is a non-zero number(int or float)
+        """
+        spares=self._player if v>0 else self._alien
+        if len(spares)==0:
+            return Bolt(x_c,y_c,v)
+        bolt=spares.pop()
+        bolt.refire(x_c,y_c,v)
+        return bolt
+
+    def release(self,bolt):
+        """
+        Returns a spent bolt to the pool
+
+        The bolt must not be drawn again until it is handed out by acquire.
+
+        Parameter bolt: The spent bolt
+        Precondition: bolt is a Bolt that is no longer in use
+        """
+        assert isinstance(bolt,Bolt)
+        spares=self._player if bolt.isPlayerBolt() else self._alien
+        if len(spares)<self._capacity:
+            spares.append(bolt)
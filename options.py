@@ -0,0 +1,29 @@
+"""
+Command line option module for Alien Invaders
+
+The command line tools (benchmark.py, balance.py, raster.py) take their
+options in the --name=value form, because consts.py reads the first three
+plain arguments as the formation. This module reads those options, so that
+the tools do not have to import one another.
+
+Peter Ng'ang'a Wainaina pnw6
+Iman Kiio iwk4
+6th December 2021
+"""
+
+
+def parse_options(args):
+    """
+    Returns a dictionary of the --name=value options in args
+
+    An option with no value (like --save-baseline) is True.
+
+    Parameter args: The command line arguments
+    Precondition: args is a list of strings
+    """
+    options={}
+    for arg in args:
+        if arg.startswith('--'):
+            name,sep,value=arg[2:].partition('=')
+            options[name]=value if sep else True
+    return options
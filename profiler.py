@@ -0,0 +1,120 @@
+"""
+Phase profiler module for Alien Invaders
+
+This module records how long each phase of a wave update takes, frame by
+frame. When a wave goes over its frame budget, the summary shows which
+phase is responsible.
+
+The samples are kept in a ring buffer that is allocated once, so profiling
+a long game costs no memory after the first frame. Only the most recent
+frames are summarized.
+
+Peter Ng'ang'a Wainaina pnw6
+Iman Kiio iwk4
+6th December 2021
+"""
+from consts import *
+import numpy as np
+
+# The phases of WaveSim.update, in the order they run
+PROFILE_PHASES = ('_move_ship','_fire','_move_aliens','_move_bolt','_collides','_checkEnd')
+# The percentiles in a summary
+PROFILE_PERCENTILES = (50,95,99)
+
+
+class PhaseProfiler(object):
+    """
+    A class to record the time spent in each phase of a wave update.
+
+    A frame is recorded with one call to add, with a time for every phase in
+    PROFILE_PHASES. A phase that did not run in a frame (the ship does not
+    move while it explodes) is given as None, and is left out of the summary
+    of that phase.
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _samples: the phase times of the most recent frames, in seconds
+    # Invariant: _samples is a capacity x (len(PROFILE_PHASES)+1) numpy array
+    # of floats. The last column is the total of the frame. Phases that did
+    # not run are NaN.
+    #
+    # Attribute _count: the number of frames recorded since the last clear
+    # Invariant: _count is an int >= 0. Frame _count-1 is in row
+    # (_count-1) % capacity of _samples.
+
+    def getCount(self):
+        """
+        Returns the number of frames recorded since the profiler was cleared
+        """
+        return self._count
+
+    def getCapacity(self):
+        """
+        Returns the number of frames kept for the summary
+        """
+        return self._samples.shape[0]
+
+    def __init__(self,capacity):
+        """
+        Initializes a profiler that keeps the last capacity frames
+
+        Parameter capacity: The number of frames kept
+        Precondition: capacity is an int > 0
+        """
+        assert isinstance(capacity,int) and capacity>0
+        self._samples=np.full((capacity,len(PROFILE_PHASES)+1),np.nan)
+        self._count=0
+
+    def add(self,moveShip,fire,moveAliens,moveBolt,collides,checkEnd):
+        """
+        Records the phase times of one frame, in seconds
+
+        Each parameter is the time of the phase of the same name, and is a
+        float >= 0, or None if the phase did not run in this frame.
+        """
+        row=self._samples[self._count % self._samples.shape[0]]
+        total=0.0
+        for index,value in enumerate((moveShip,fire,moveAliens,moveBolt,collides,checkEnd)):
+            if value is None:
+                row[index]=np.nan
+            else:
+                row[index]=value
+                total+=value
+        row[-1]=total
+        self._count+=1
+
+    def clear(self):
+        """
+        Forgets every frame recorded so far
+        """
+        self._samples.fill(np.nan)
+        self._count=0
+
+    def getSummary(self):
+        """
+        Returns the percentiles of each phase over the kept frames, in ms
+
+        The result is a dictionary from each phase name (and 'total') to a
+        tuple of its times at PROFILE_PERCENTILES. A phase that did not run in
+        any kept frame has a tuple of NaN.
+        """
+        samples=self._samples[:min(self._count,self._samples.shape[0])]
+        summary={}
+        for index,name in enumerate(PROFILE_PHASES+('total',)):
+            column=samples[:,index]
+            column=column[~np.isnan(column)]
+            if len(column)==0:
+                summary[name]=(np.nan,)*len(PROFILE_PERCENTILES)
+            else:
+                summary[name]=tuple(float(value)*1000 for value in
+                    np.percentile(column,PROFILE_PERCENTILES))
+        return summary
+
+    def report(self):
+        """
+        Returns the summary as a table, one line per phase
+        """
+        lines=['%-14s' % ('%d frames' % min(self._count,self._samples.shape[0]))+
+            ''.join('%10s' % ('p%d ms' % pct) for pct in PROFILE_PERCENTILES)]
+        for name,values in self.getSummary().items():
+            lines.append('%-14s' % name+''.join('%10.4f' % value for value in values))
+        return '\n'.join(lines)
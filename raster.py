@@ -0,0 +1,269 @@
+"""
+Observation rasterizer for Alien Invaders
+
+This module draws the state of a headless wave (see simulation.py) into a
+small grid of bytes, one byte per cell of RASTER_SCALE x RASTER_SCALE pixels
+of the game window. Each cell holds the label of what covers it:
+
+    RASTER_EMPTY         nothing
+    RASTER_DEFENSE       the defense line
+    RASTER_ALIEN+i       a living alien with image ALIEN_IMAGES[i]
+    RASTER_SHIP          the ship
+    RASTER_PLAYER_BOLT   a player bolt
+    RASTER_ALIEN_BOLT    an alien bolt
+
+Later items are drawn over earlier ones, in this order. Row 0 of the grid is
+the top of the window, as in an image.
+
+The grid is drawn straight from the positions in the model into one array,
+made once and reused every frame, so it is cheap enough to be the
+observation of a computer player (see env.py). The defense line and the
+aliens are kept in a second array, and only redrawn when the formation has
+moved or lost an alien (about once a second); on other frames they are
+copied over, and only the ship and the bolts are drawn. It can also be saved as a
+grayscale image, for thumbnails of a session with no Kivy. To make a
+thumbnail of an input log (see replay.py) from the command line, type
+
+    python raster.py wave.inp thumb.pgm
+
+to draw the end of the wave, or add --frame=N to draw the wave after frame N
+of the log.
+
+Peter Ng'ang'a Wainaina pnw6
+Iman Kiio iwk4
+6th December 2021
+"""
+from consts import *
+from options import parse_options
+from replay import InputLog, ReplayPlayer
+import numpy as np
+import sys
+
+# The number of pixels on a side of a cell
+RASTER_SCALE = 8
+# The labels of the cells
+RASTER_EMPTY = 0
+RASTER_DEFENSE = 1
+RASTER_ALIEN = 2
+RASTER_SHIP = RASTER_ALIEN+len(ALIEN_IMAGES)
+RASTER_PLAYER_BOLT = RASTER_SHIP+1
+RASTER_ALIEN_BOLT = RASTER_SHIP+2
+# The gray level (0..255) of each label in a saved image
+RASTER_GRAYS = (0,60)+tuple(110+40*i for i in range(len(ALIEN_IMAGES)))+(255,230,200)
+
+
+class WaveRaster(object):
+    """
+    A class to draw a wave into a grid of labels.
+
+    Attribute width: the number of columns of the grid
+    Invariant: width is an int > 0
+
+    Attribute height: the number of rows of the grid
+    Invariant: height is an int > 0
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _scale: the number of pixels on a side of a cell
+    # Invariant: _scale is an int > 0
+    #
+    # Attribute _grid: the grid, redrawn by every call to draw
+    # Invariant: _grid is a height x width numpy array of uint8 labels
+    #
+    # Attribute _columnMap: the formation column covering each grid column
+    # Invariant: _columnMap is a numpy array of width ints, -1 for none
+    #
+    # Attribute _rowMap: the formation row covering each grid row
+    # Invariant: _rowMap is a numpy array of height ints, -1 for none
+    #
+    # Attribute _background: the defense line and aliens of the last draw
+    # Invariant: _background is a height x width numpy array of uint8 labels
+    #
+    # Attribute _source: the wave _background was drawn from
+    # Invariant: _source is a WaveSim, or None before the first draw
+    #
+    # Attribute _origin: the formation origin when _background was drawn
+    # Invariant: _origin is an (x,y) tuple of floats, or None before the first draw
+    #
+    # Attribute _alive: the alive mask when _background was drawn
+    # Invariant: _alive is a numpy array of bools, or None before the first draw
+
+    def __init__(self,scale=RASTER_SCALE):
+        """
+        Initializes a rasterizer with cells of scale x scale pixels
+
+        Parameter scale: The number of pixels on a side of a cell
+        Precondition: scale is an int > 0
+        """
+        assert isinstance(scale,int) and scale>0
+        self._scale=scale
+        self.width=-(-GAME_WIDTH//scale)
+        self.height=-(-GAME_HEIGHT//scale)
+        self._grid=np.zeros((self.height,self.width),dtype=np.uint8)
+        self._columnMap=np.zeros(self.width,dtype=np.intp)
+        self._rowMap=np.zeros(self.height,dtype=np.intp)
+        self._background=np.zeros((self.height,self.width),dtype=np.uint8)
+        self._source=None
+        self._origin=None
+        self._alive=None
+
+    def getGrid(self):
+        """
+        Returns the grid last drawn
+
+        The array is reused by every call to draw, so copy it if it must be kept.
+        """
+        return self._grid
+
+    def draw(self,sim):
+        """
+        Draws sim into the grid, and returns the grid
+
+        Parameter sim: The wave to draw
+        Precondition: sim is a WaveSim
+        """
+        grid=self._grid
+        alive=sim.getAlive()
+        origin=sim.getFormationOrigin()
+        if sim is self._source and origin==self._origin and np.array_equal(alive,self._alive):
+            np.copyto(grid,self._background)
+        else:
+            self._draw_background(sim)
+            np.copyto(self._background,grid)
+            self._source=sim
+            self._origin=origin
+            self._alive=alive.copy()
+
+        x=sim.getShipX()
+        if not x is None:
+            self._fill(x-SHIP_WIDTH/2,SHIP_Y-SHIP_HEIGHT/2,x+SHIP_WIDTH/2,
+                SHIP_Y+SHIP_HEIGHT/2,RASTER_SHIP)
+
+        for bolt in sim.getBolts():
+            self._fill(bolt.x-BOLT_WIDTH/2,bolt.y-BOLT_HEIGHT/2,bolt.x+BOLT_WIDTH/2,
+                bolt.y+BOLT_HEIGHT/2,RASTER_PLAYER_BOLT if bolt.isPlayerBolt()
+                else RASTER_ALIEN_BOLT)
+        return grid
+
+    def _draw_background(self,sim):
+        """
+        Draws the defense line and the living aliens of sim into the empty grid
+
+        Parameter sim: The wave to draw
+        Precondition: sim is a WaveSim
+        """
+        self._grid.fill(RASTER_EMPTY)
+        self._fill(0,DEFENSE_LINE,GAME_WIDTH,DEFENSE_LINE+1,RASTER_DEFENSE)
+        alive=sim.getAlive()
+        if sim.getAliveCount()>0:
+            originx,originy=sim.getFormationOrigin()
+            xs,ys=sim.getAlienPositions()
+            if sim.isRegular():
+                self._draw_aliens(originx+xs[0]-ALIEN_WIDTH/2,originy+ys[:,0]-ALIEN_HEIGHT/2,
+                    np.where(alive,RASTER_ALIEN+sim.getAlienImages(),RASTER_EMPTY))
+            else:
+                lefts=(originx+xs[alive]-ALIEN_WIDTH/2).tolist()
+                bottoms=(originy+ys[alive]-ALIEN_HEIGHT/2).tolist()
+                images=sim.getAlienImages()[alive].tolist()
+                for left,bottom,image in zip(lefts,bottoms,images):
+                    self._fill(left,bottom,left+ALIEN_WIDTH,bottom+ALIEN_HEIGHT,
+                        RASTER_ALIEN+image)
+
+    def save(self,path):
+        """
+        Saves the grid last drawn as a grayscale image (binary PGM)
+
+        The labels are shown with the gray levels in RASTER_GRAYS.
+
+        Parameter path: The name of the file to write
+        Precondition: path is a string
+        """
+        grays=np.array(RASTER_GRAYS,dtype=np.uint8)[self._grid]
+        with open(path,'wb') as file:
+            file.write(b'P5\n%d %d\n255\n' % (self.width,self.height))
+            file.write(grays.tobytes())
+
+    def _fill(self,left,bottom,right,top,label):
+        """
+        Sets every cell the rectangle in game pixels touches to label
+
+        Cells outside the grid are ignored.
+
+        Parameter left, bottom, right, top: The sides of the rectangle
+        Precondition: left, bottom, right, top are numbers, left<right, bottom<top
+
+        Parameter label: The label to set
+        Precondition: label is an int in 0..255
+        """
+        scale=self._scale
+        column0=max(int(left//scale),0)
+        column1=min(int(-(-right//scale)),self.width)
+        row0=max(int((GAME_HEIGHT-top)//scale),0)
+        row1=min(int(-(-(GAME_HEIGHT-bottom)//scale)),self.height)
+        if column0<column1 and row0<row1:
+            self._grid[row0:row1,column0:column1]=label
+
+    def _draw_aliens(self,lefts,bottoms,labels):
+        """
+        Draws the aliens of a formation into the grid
+
+        The formation is a grid: every alien in a column has the same x, and
+        every alien in a row has the same y (see WaveSim.isRegular). So rather
+        than filling a rectangle per alien, this maps each grid column to the
+        formation column covering it, and each grid row to the formation row,
+        and looks up the labels of the whole formation in one go.
+
+        The aliens are drawn over the defense line but never over empty
+        labels, which works because every alien label is above RASTER_DEFENSE.
+
+        Parameter lefts: The left side of the aliens in each formation column
+        Precondition: lefts is a 1-d numpy array of floats, increasing
+
+        Parameter bottoms: The bottom side of the aliens in each formation row
+        Precondition: bottoms is a 1-d numpy array of floats, decreasing
+
+        Parameter labels: The label of each alien (RASTER_EMPTY if it is dead)
+        Precondition: labels is a len(bottoms) x len(lefts) numpy array of ints
+        """
+        scale=self._scale
+        columnMap=self._columnMap
+        rowMap=self._rowMap
+        columnMap.fill(-1)
+        rowMap.fill(-1)
+        columns0=np.maximum(lefts//scale,0).astype(int).tolist()
+        columns1=np.maximum(-((-lefts-ALIEN_WIDTH)//scale),0).astype(int).tolist()
+        for column in range(len(columns0)):
+            columnMap[columns0[column]:columns1[column]]=column
+        tops=GAME_HEIGHT-bottoms
+        rows0=np.maximum((tops-ALIEN_HEIGHT)//scale,0).astype(int).tolist()
+        rows1=np.maximum(-(-tops//scale),0).astype(int).tolist()
+        for row in range(len(rows0)):
+            rowMap[rows0[row]:rows1[row]]=row
+        top=min(rows0[0],self.height)
+        bottom=min(rows1[-1],self.height)
+        if top>=bottom:
+            return
+        #index -1 (a cell no alien covers) is the extra empty row and column
+        table=np.zeros((labels.shape[0]+1,labels.shape[1]+1),dtype=np.uint8)
+        table[:-1,:-1]=labels
+        #two takes along one axis each are far cheaper than one 2-d fancy index
+        block=table.take(self._rowMap[top:bottom],axis=0).take(self._columnMap,axis=1)
+        np.maximum(self._grid[top:bottom],block,out=self._grid[top:bottom])
+
+
+
+# Make a thumbnail of an input log from the command line
+if __name__ == '__main__':
+    paths=[arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    options=parse_options(sys.argv[1:])
+    raster=WaveRaster()
+    player=ReplayPlayer(InputLog(paths[-2]))
+    if 'frame' in options:
+        target=int(options['frame'])
+        def observe(frame,sim):
+            if frame==target:
+                raster.draw(sim)
+        player.run(observe)
+    else:
+        player.run()
+        raster.draw(player.getWave())
+    raster.save(paths[-1])
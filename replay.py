@@ -0,0 +1,314 @@
+"""
+Input recording and replay module for Alien Invaders
+
+This module records the input of a wave to a compact binary log, and plays
+a log back through a headless WaveSim as fast as the CPU allows. A replay
+needs no window, so it is a repeatable workload for profiling and a way to
+rerun a bug report offline.
+
+A log starts with a header holding the seed of the wave's random number
+generator and the settings that change how a wave plays out. Then there is
+one record per frame: a byte with a bit for each key the game reads, and
+the frame time as a double. The frame time is left out when it is the same
+as the frame before, so a log at a steady frame rate costs one byte per
+frame.
+
+A log cut off part way through a record (say the game crashed before the log
+was closed) is read up to its last complete record. The recorder flushes the
+log whenever the game changes state, so little is lost.
+
+To replay a log from the command line, type
+
+    python replay.py wave.inp
+
+The log holds the formation it was recorded with, so it plays back the same
+whatever formation is given on the command line.
+
+Peter Ng'ang'a Wainaina pnw6
+Iman Kiio iwk4
+6th December 2021
+"""
+from consts import *
+from simulation import *
+import random
+import struct
+import sys
+import time
+
+# The start of every log file
+LOG_MAGIC = b'AINP'
+# The version of the log format
+LOG_VERSION = 1
+# Header: magic, version, seed, LOGIC_RATE, MAX_LOGIC_STEPS, ALIEN_ROWS,
+# ALIENS_IN_ROW, ALIEN_SPEED
+LOG_HEADER = struct.Struct('<4sBQHHBBd')
+# The frame time of a record
+LOG_DT = struct.Struct('<d')
+# The keys the game reads, with their bit in a record
+LOG_KEYS = (('left',0x01),('right',0x02),('up',0x04),('s',0x08))
+# Bit set when a record has the same frame time as the one before
+LOG_SAME_DT = 0x80
+
+
+class InputRecorder(object):
+    """
+    A class to record the input of a single wave to a binary log.
+
+    Call record once per frame, from the frame the wave is created until it
+    is over, then call close.
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _file: the log file being written
+    # Invariant: _file is a binary file open for writing, or None once closed
+    #
+    # Attribute _lastdt: the frame time of the last record
+    # Invariant: _lastdt is a float, or None if nothing has been recorded
+
+    def __init__(self,path,seed):
+        """
+        Initializes a recorder writing to the file path
+
+        Parameter path: The name of the log file
+        Precondition: path is a string naming a file that can be written
+
+        Parameter seed: The seed of the random number generator of the wave
+        Precondition: seed is an int in 0..2**64-1
+        """
+        assert isinstance(path,str)
+        assert isinstance(seed,int) and 0<=seed<2**64
+        self._file=open(path,'wb')
+        self._file.write(LOG_HEADER.pack(LOG_MAGIC,LOG_VERSION,seed,LOGIC_RATE,
+            MAX_LOGIC_STEPS,ALIEN_ROWS,ALIENS_IN_ROW,ALIEN_SPEED))
+        self._lastdt=None
+
+    def record(self,input,dt):
+        """
+        Records the keys held down in input, and the frame time dt
+
+        Parameter input: The input from the User
+        Precondition: input has a method is_key_down (e.g. GInput or SimInput)
+
+        Parameter dt: The time in seconds since last update
+        Precondition: dt is a number (int or float)
+        """
+        assert not self._file is None
+        mask=encode_keys(input)
+        dt=float(dt)
+        if dt==self._lastdt:
+            self._file.write(bytes((mask|LOG_SAME_DT,)))
+        else:
+            self._file.write(bytes((mask,)))
+            self._file.write(LOG_DT.pack(dt))
+            self._lastdt=dt
+
+    def flush(self):
+        """
+        Writes the records so far to the file, so they survive a crash
+        """
+        if not self._file is None:
+            self._file.flush()
+
+    def close(self):
+        """
+        Finishes the log and closes the file
+        """
+        if not self._file is None:
+            self._file.close()
+            self._file=None
+
+
+class InputLog(object):
+    """
+    A class representing a log read back from a file.
+
+    Attribute seed: the seed of the random number generator of the wave
+    Invariant: seed is an int >= 0
+
+    Attribute logicRate: the value of LOGIC_RATE when the log was recorded
+    Invariant: logicRate is an int >= 0
+
+    Attribute maxSteps: the value of MAX_LOGIC_STEPS when the log was recorded
+    Invariant: maxSteps is an int > 0
+
+    Attribute rows: the number of rows of aliens in the recorded wave
+    Invariant: rows is an int > 0
+
+    Attribute columns: the number of aliens per row in the recorded wave
+    Invariant: columns is an int > 0
+
+    Attribute speed: the number of seconds between alien steps in the recorded wave
+    Invariant: speed is a float > 0
+
+    Attribute truncated: whether the file ended part way through a record
+    Invariant: truncated is a bool
+
+    Attribute frames: the recorded frames
+    Invariant: frames is a list of (mask,dt) pairs, where mask is an int with
+    the bits of LOG_KEYS and dt is a float
+    """
+
+    def __init__(self,path):
+        """
+        Initializes the log by reading the file path
+
+        If the file ends part way through a record, the frames stop at the
+        last complete one.
+
+        Parameter path: The name of the log file
+        Precondition: path is a string naming a log written by InputRecorder
+        """
+        with open(path,'rb') as file:
+            data=file.read()
+        header=LOG_HEADER.unpack_from(data,0)
+        assert header[0]==LOG_MAGIC, '%s is not an input log' % repr(path)
+        assert header[1]==LOG_VERSION, '%s has unsupported version %d' % (repr(path),header[1])
+        self.seed=header[2]
+        self.logicRate=header[3]
+        self.maxSteps=header[4]
+        self.rows,self.columns,self.speed=header[5:8]
+        self.truncated=False
+
+        self.frames=[]
+        pos=LOG_HEADER.size
+        dt=None
+        while pos<len(data):
+            mask=data[pos]
+            pos+=1
+            if not mask & LOG_SAME_DT:
+                if pos+LOG_DT.size>len(data):
+                    self.truncated=True
+                    break
+                dt=LOG_DT.unpack_from(data,pos)[0]
+                pos+=LOG_DT.size
+            self.frames.append((mask & ~LOG_SAME_DT,dt))
+
+
+class ReplayPlayer(object):
+    """
+    A class to play an InputLog back through a headless WaveSim.
+
+    The player does what Invaders does with a wave, one recorded frame at a
+    time: it updates the wave while it is active (in fixed steps, if the log
+    was recorded that way), and when the ship is destroyed it waits for a
+    frame with S held down before bringing on a new ship.
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _log: the log being played
+    # Invariant: _log is an InputLog
+    #
+    # Attribute _sim: the wave the log is played through
+    # Invariant: _sim is a WaveSim
+    #
+    # Attribute _inputs: the input for each possible key mask
+    # Invariant: _inputs is a list of 16 SimInput objects, indexed by mask
+
+    def getWave(self):
+        """
+        Returns the WaveSim the log is played through
+        """
+        return self._sim
+
+    def __init__(self,log):
+        """
+        Initializes a player for log, with a new wave seeded from the log
+
+        The wave has the formation the log was recorded with.
+
+        Parameter log: The log to play
+        Precondition: log is an InputLog
+        """
+        assert isinstance(log,InputLog)
+        self._log=log
+        self._sim=WaveSim(random.Random(log.seed),log.rows,log.columns,log.speed)
+        self._inputs=[SimInput(decode_keys(mask)) for mask in range(16)]
+
+    def run(self,observer=None):
+        """
+        Plays every frame of the log, and returns the number of wave updates
+
+        The run stops early if the wave ends before the log does.
+
+        Parameter observer: The function to call after every wave update
+        Precondition: observer is None, or a function taking the frame number
+        of the log and the WaveSim
+        """
+        active=True
+        accumulator=0.0
+        updates=0
+        step=1.0/self._log.logicRate if self._log.logicRate>0 else None
+        for frame,(mask,dt) in enumerate(self._log.frames):
+            input=self._inputs[mask]
+            if active:
+                if step is None:
+                    self._sim.update(input,dt)
+                    updates+=1
+                    if not observer is None:
+                        observer(frame,self._sim)
+                else:
+                    accumulator+=dt
+                    steps=0
+                    while accumulator>=step and not self._is_stopped():
+                        self._sim.update(input,step)
+                        updates+=1
+                        if not observer is None:
+                            observer(frame,self._sim)
+                        accumulator-=step
+                        steps+=1
+                        if steps==self._log.maxSteps:
+                            accumulator=0.0
+                if not self._sim.hasPlayerWon() is None:
+                    break
+                if self._sim.isShipDestroyed():
+                    if not self._sim.isLifeLeft():
+                        break
+                    active=False
+                    accumulator=0.0
+            if not active and input.is_key_down('s'):
+                active=True
+                self._sim.createNewShip()
+                self._sim.resetShipDestroyed()
+        return updates
+
+    def _is_stopped(self):
+        """
+        Returns True if the wave is over or the ship has been destroyed
+        """
+        return not self._sim.hasPlayerWon() is None or self._sim.isShipDestroyed()
+
+
+def encode_keys(input):
+    """
+    Returns the bits of LOG_KEYS for the keys held down in input
+
+    Parameter input: The input from the User
+    Precondition: input has a method is_key_down (e.g. GInput or SimInput)
+    """
+    mask=0
+    for key,bit in LOG_KEYS:
+        if input.is_key_down(key):
+            mask|=bit
+    return mask
+
+
+def decode_keys(mask):
+    """
+    Returns a tuple of the keys whose bits are set in mask
+
+    Parameter mask: The key bits
+    Precondition: mask is an int >= 0
+    """
+    return tuple(key for key,bit in LOG_KEYS if mask & bit)
+
+
+# Replay a log from the command line
+if __name__ == '__main__':
+    #the log is the last argument, after any formation consts.py has read
+    log=InputLog(sys.argv[-1])
+    player=ReplayPlayer(log)
+    start=time.perf_counter()
+    updates=player.run()
+    elapsed=time.perf_counter()-start
+    wave=player.getWave()
+    print('frames:',len(log.frames),'updates:',updates,'(truncated)' if log.truncated else '')
+    print('result:',wave.hasPlayerWon(),'score:',wave.getScore(),'lives:',wave.getLives())
+    print('time: %.3fs (%.0f updates per second)' % (elapsed,updates/elapsed if elapsed>0 else 0))
@@ -0,0 +1,272 @@
+"""
+Rewind module for Alien Invaders
+
+This module keeps the recent history of a wave, so that it can be rewound to
+any frame in the last few seconds at once, with no replay from the start of
+the wave.
+
+Every frame is stored as a snapshot (see WaveSim.snapshot). Most of a
+snapshot does not change from one frame to the next, so only every
+REWIND_KEYFRAME-th frame is stored whole, as a keyframe. The frames in between
+are stored as the runs of bytes where they differ from their keyframe.
+Getting any frame back costs one copy of its keyframe and one patch.
+
+The history lives in a ring of a fixed number of slots, so its memory stays
+bounded however long the game runs. The ring is a whole number of keyframe
+blocks. A new keyframe overwrites the oldest block, so the history always
+starts at a keyframe.
+
+Each slot is a bytearray that is written over in place and reused every time
+the ring comes round. A slot is only replaced by a bigger one when a frame
+does not fit in it, so once the ring has filled, recording allocates no
+storage. (The snapshot taken of the wave each frame, and its delta, are still
+short-lived temporary objects.)
+
+If REWIND_KEY is set in consts.py (it is None by default), the game keeps a
+history of the wave it is playing, and rewinds it by REWIND_JUMP seconds when
+that key is pressed (see app.py). Rewinding ends the input log of the wave.
+
+Peter Ng'ang'a Wainaina pnw6
+Iman Kiio iwk4
+6th December 2021
+"""
+from consts import *
+import numpy as np
+import struct
+
+# A delta: the length of the frame, the number of runs
+REWIND_DELTA = struct.Struct('<II')
+# A run of a delta: its offset in the frame, its length
+REWIND_RUN = struct.Struct('<II')
+# Runs closer together than this many bytes are merged into one
+REWIND_GAP = 8
+
+
+class RewindBuffer(object):
+    """
+    A class to keep the last frames of a wave, and rewind the wave to them.
+
+    Call record once per wave update, with the wave after the update. Frames
+    are numbered from 0, in the order they were recorded.
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _slots: the storage of the frames
+    # Invariant: _slots is a list of bytearrays, of a fixed length that is a
+    # multiple of _interval. Frame f is stored at the start of slot
+    # f % len(_slots). It is a snapshot if f is a multiple of _interval (a
+    # keyframe), and otherwise a delta against the keyframe before it.
+    #
+    # Attribute _lengths: the number of bytes stored in each slot
+    # Invariant: _lengths is a list of ints >= 0, as long as _slots, with 0
+    # for a slot that holds no frame
+    #
+    # Attribute _interval: the number of frames in a keyframe block
+    # Invariant: _interval is an int > 0
+    #
+    # Attribute _next: the number of the next frame to record
+    # Invariant: _next is an int >= 0
+    #
+    # Attribute _first: the number of the oldest frame still held
+    # Invariant: _first is an int, a multiple of _interval, in 0.._next
+    #
+    # Attribute _key: the current keyframe, as an array
+    # Invariant: _key is a numpy array of uint8 over the snapshot in the slot
+    # of the last keyframe, or None if nothing has been recorded
+
+    def getOldest(self):
+        """
+        Returns the number of the oldest frame that can be rewound to
+
+        This is None if nothing has been recorded.
+        """
+        return self._first if self._next>0 else None
+
+    def getNewest(self):
+        """
+        Returns the number of the last frame recorded, or None if there is none
+        """
+        return self._next-1 if self._next>0 else None
+
+    def getSize(self):
+        """
+        Returns the number of bytes of frame data held
+        """
+        return sum(self._lengths)
+
+    def getCapacity(self):
+        """
+        Returns the number of bytes of storage held by the slots
+        """
+        return sum(len(slot) for slot in self._slots)
+
+    def __init__(self,seconds=REWIND_SECONDS,rate=LOGIC_RATE,interval=REWIND_KEYFRAME):
+        """
+        Initializes an empty history of seconds of play at rate frames a second
+
+        The ring is rounded up to a whole number of keyframe blocks, plus one
+        block, so at least seconds of play can always be rewound.
+
+        Parameter seconds: The length of the history
+        Precondition: seconds is a number (int or float) > 0
+
+        Parameter rate: The number of frames recorded per second
+        Precondition: rate is an int > 0
+
+        Parameter interval: The number of frames from one keyframe to the next
+        Precondition: interval is an int > 0
+        """
+        assert (isinstance(seconds,int) or isinstance(seconds,float)) and seconds>0
+        assert isinstance(rate,int) and rate>0
+        assert isinstance(interval,int) and interval>0
+        blocks=-(-int(seconds*rate)//interval)+1
+        self._slots=[bytearray() for _ in range(blocks*interval)]
+        self._lengths=[0]*len(self._slots)
+        self._interval=interval
+        self._next=0
+        self._first=0
+        self._key=None
+
+    def record(self,wave):
+        """
+        Records the state of wave as the next frame
+
+        Parameter wave: The wave to record
+        Precondition: wave is a WaveSim or Wave
+        """
+        data=wave.snapshot()
+        if self._next % self._interval==0:
+            #this overwrites the keyframe of the oldest block, if the ring is full
+            if self._next>=len(self._slots):
+                self._first=self._next-len(self._slots)+self._interval
+            slot=self._store(self._next % len(self._slots),data)
+            self._key=np.frombuffer(slot,dtype=np.uint8,count=len(data))
+        else:
+            self._store(self._next % len(self._slots),_encode(self._key,data))
+        self._next+=1
+
+    def getFrame(self,frame):
+        """
+        Returns the snapshot of the given frame
+
+        Parameter frame: The frame number
+        Precondition: frame is an int in getOldest()..getNewest()
+        """
+        assert self._next>0 and self.getOldest()<=frame<=self.getNewest()
+        slot=self._stored(frame % len(self._slots))
+        if frame % self._interval==0:
+            return bytes(slot)
+        key=self._stored((frame-frame % self._interval) % len(self._slots))
+        return _decode(key,slot)
+
+    def rewind(self,wave,frame):
+        """
+        Restores wave to the given frame, and forgets every frame after it
+
+        Recording carries on from frame, so the next frame recorded is
+        frame+1.
+
+        Parameter wave: The wave to restore
+        Precondition: wave is a WaveSim or Wave with the settings of the
+        recorded wave
+
+        Parameter frame: The frame number
+        Precondition: frame is an int in getOldest()..getNewest()
+        """
+        wave.restore(self.getFrame(frame))
+        for number in range(frame+1,self._next):
+            self._lengths[number % len(self._slots)]=0
+        self._next=frame+1
+        start=(frame-frame % self._interval) % len(self._slots)
+        self._key=np.frombuffer(self._slots[start],dtype=np.uint8,count=self._lengths[start])
+
+    def clear(self):
+        """
+        Forgets every frame (for a new wave)
+        """
+        for index in range(len(self._slots)):
+            self._lengths[index]=0
+        self._next=0
+        self._first=0
+        self._key=None
+
+    def _store(self,index,data):
+        """
+        Copies data into the slot at index, and returns the slot
+
+        The slot is only replaced by a bigger bytearray if data does not fit.
+
+        Parameter index: The slot
+        Precondition: index is an int in 0..len(_slots)-1
+
+        Parameter data: The frame
+        Precondition: data is a bytes object
+        """
+        slot=self._slots[index]
+        if len(slot)<len(data):
+            #a new array, as _key may still be a view of the old one
+            slot=bytearray(len(data))
+            self._slots[index]=slot
+        slot[:len(data)]=data
+        self._lengths[index]=len(data)
+        return slot
+
+    def _stored(self,index):
+        """
+        Returns a memoryview of the frame stored in the slot at index
+
+        Parameter index: The slot
+        Precondition: index is an int in 0..len(_slots)-1, of a slot holding a frame
+        """
+        return memoryview(self._slots[index])[:self._lengths[index]]
+
+
+def _encode(key,data):
+    """
+    Returns the delta that turns the keyframe key into the snapshot data
+
+    Parameter key: The keyframe
+    Precondition: key is a numpy array of uint8
+
+    Parameter data: The snapshot
+    Precondition: data is a bytes object
+    """
+    target=np.frombuffer(data,dtype=np.uint8)
+    common=min(len(key),len(target))
+    changed=np.flatnonzero(key[:common]!=target[:common])
+    starts=[]
+    ends=[]
+    if len(changed)>0:
+        breaks=np.flatnonzero(np.diff(changed)>REWIND_GAP)
+        starts=[int(changed[0])]+(changed[breaks+1]).tolist()
+        ends=(changed[breaks]+1).tolist()+[int(changed[-1])+1]
+    if len(target)>common:
+        starts.append(common)
+        ends.append(len(target))
+    parts=[REWIND_DELTA.pack(len(target),len(starts))]
+    for start,end in zip(starts,ends):
+        parts.append(REWIND_RUN.pack(start,end-start))
+        parts.append(data[start:end])
+    return b''.join(parts)
+
+
+def _decode(key,delta):
+    """
+    Returns the snapshot made by applying delta to the keyframe key
+
+    Parameter key: The keyframe
+    Precondition: key is a bytes-like object
+
+    Parameter delta: The delta
+    Precondition: delta is a bytes-like object returned by _encode for key
+    """
+    length,runs=REWIND_DELTA.unpack_from(delta,0)
+    frame=bytearray(key[:length])
+    if len(frame)<length:
+        frame.extend(bytes(length-len(frame)))
+    pos=REWIND_DELTA.size
+    for _ in range(runs):
+        start,size=REWIND_RUN.unpack_from(delta,pos)
+        pos+=REWIND_RUN.size
+        frame[start:start+size]=delta[pos:pos+size]
+        pos+=size
+    return bytes(frame)
@@ -0,0 +1,354 @@
+"""
+Shared-memory batch of training environments for Alien Invaders
+
+This module runs many InvadersEnv environments (see env.py) in worker
+processes. The workers write their observations, rewards and done flags
+straight into arrays in multiprocessing.shared_memory, and read their actions
+from one too, so nothing is pickled through a pipe on a step. The learner sees
+the whole batch as numpy arrays over that memory, with no copy.
+
+A step is started by writing the actions and releasing one semaphore per
+worker. Each worker steps its share of the environments, writes the number of
+the step into its slot of the control array, and releases a shared semaphore.
+The step is complete when the learner has taken that semaphore once per
+worker. An environment whose episode ends is reset at once, so its
+observation is the first of the next episode (its done flag is still set for
+that step).
+
+    envs=SharedEnvs(64)
+    obs=envs.reset()
+    obs,rewards,dones=envs.step(actions)
+    envs.close()
+
+The arrays returned are overwritten by the next step, so copy them if they
+must be kept.
+
+Peter Ng'ang'a Wainaina pnw6
+Iman Kiio iwk4
+6th December 2021
+"""
+from consts import *
+from env import InvadersEnv
+from multiprocessing import shared_memory
+import multiprocessing
+import numpy as np
+import os
+
+# The commands to the workers
+SHARED_STEP = 0
+SHARED_RESET = 1
+SHARED_CLOSE = 2
+# The number of seconds to wait for a worker before checking it is alive
+SHARED_POLL = 1.0
+# The number of seconds to wait for a worker to exit on close
+SHARED_CLOSE_WAIT = 5.0
+
+
+class SharedEnvs(object):
+    """
+    A class to step a batch of environments in worker processes.
+
+    Environment i plays its k-th episode with the seed seed+i+k*count, so a
+    run can be repeated exactly whatever the number of workers.
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _count: the number of environments
+    # Invariant: _count is an int > 0
+    #
+    # Attribute _blocks: the shared memory, by array name
+    # Invariant: _blocks is a dictionary of SharedMemory objects with keys
+    # 'obs', 'rewards', 'dones', 'actions' and 'control'
+    #
+    # Attribute _obs: the observation of each environment
+    # Invariant: _obs is a numpy array of shape (_count,)+observation shape, in
+    # _blocks['obs']
+    #
+    # Attribute _rewards: the reward of each environment on the last step
+    # Invariant: _rewards is a numpy array of _count float32, in _blocks['rewards']
+    #
+    # Attribute _dones: whether each episode ended on the last step
+    # Invariant: _dones is a numpy array of _count bools, in _blocks['dones']
+    #
+    # Attribute _actions: the action of each environment on the next step
+    # Invariant: _actions is a numpy array of _count int8, in _blocks['actions']
+    #
+    # Attribute _control: the command, the step number, and the last step
+    # finished by each worker
+    # Invariant: _control is a numpy array of 2+len(_workers) int64, in
+    # _blocks['control']
+    #
+    # Attribute _workers: the worker processes
+    # Invariant: _workers is a list of multiprocessing Process objects
+    #
+    # Attribute _go: the semaphore of each worker, released to start a step
+    # Invariant: _go is a list of multiprocessing Semaphore objects, one per worker
+    #
+    # Attribute _finished: the semaphore every worker releases after a step
+    # Invariant: _finished is a multiprocessing Semaphore
+    #
+    # Attribute _waiting: whether a step has been sent but not waited for
+    # Invariant: _waiting is a bool
+    #
+    # Attribute _closed: whether close has been called
+    # Invariant: _closed is a bool
+
+    def getCount(self):
+        """
+        Returns the number of environments
+        """
+        return self._count
+
+    def getObservations(self):
+        """
+        Returns the observations of every environment, as one array
+
+        The array is in shared memory, and is overwritten by every step.
+        """
+        return self._obs
+
+    def getRewards(self):
+        """
+        Returns the rewards of every environment on the last step
+        """
+        return self._rewards
+
+    def getDones(self):
+        """
+        Returns whether the episode of each environment ended on the last step
+        """
+        return self._dones
+
+    def __init__(self,count,workers=None,seed=0,raster=False,maxSteps=None,**settings):
+        """
+        Initializes count environments, and starts their worker processes
+
+        Call reset before the first step.
+
+        Parameter count: The number of environments
+        Precondition: count is an int > 0
+
+        Parameter workers: The number of worker processes (None for one per core)
+        Precondition: workers is an int > 0, or None
+
+        Parameter seed: The seed of the first episode of environment 0
+        Precondition: seed is an int
+
+        Parameter raster: Whether observations are grids instead of features
+        Precondition: raster is a bool
+
+        Parameter maxSteps: The most steps in an episode (None for the default)
+        Precondition: maxSteps is an int > 0, or None
+
+        Parameter settings: The settings of the wave, as for WaveSim
+        """
+        assert isinstance(count,int) and count>0
+        assert workers is None or (isinstance(workers,int) and workers>0)
+        assert isinstance(seed,int)
+        workers=min(workers or os.cpu_count() or 1,count)
+        options={'raster':raster}
+        if not maxSteps is None:
+            options['maxSteps']=maxSteps
+        options.update(settings)
+        probe=InvadersEnv(**options)
+        specs={'obs':((count,)+probe.observation_shape,np.uint8 if raster else np.float32),
+               'rewards':((count,),np.float32),'dones':((count,),np.bool_),
+               'actions':((count,),np.int8),'control':((2+workers,),np.int64)}
+        self._count=count
+        self._blocks={}
+        arrays={}
+        for name,(shape,dtype) in specs.items():
+            size=max(int(np.prod(shape))*np.dtype(dtype).itemsize,1)
+            self._blocks[name]=shared_memory.SharedMemory(create=True,size=size)
+            arrays[name]=np.ndarray(shape,dtype,buffer=self._blocks[name].buf)
+            arrays[name].fill(0)
+        self._obs=arrays['obs']
+        self._rewards=arrays['rewards']
+        self._dones=arrays['dones']
+        self._actions=arrays['actions']
+        self._control=arrays['control']
+        self._control[1]=-1
+        self._control[2:]=-1
+
+        #spawn, so that workers do not inherit the learner's state
+        context=multiprocessing.get_context('spawn')
+        layout={name:(self._blocks[name].name,shape,np.dtype(dtype).str)
+            for name,(shape,dtype) in specs.items()}
+        self._finished=context.Semaphore(0)
+        self._go=[]
+        self._workers=[]
+        for worker in range(workers):
+            go=context.Semaphore(0)
+            process=context.Process(target=_work,name='sharedenv-%d' % worker,daemon=True,
+                args=(layout,worker,count*worker//workers,count*(worker+1)//workers,
+                    count,seed,options,go,self._finished))
+            process.start()
+            self._go.append(go)
+            self._workers.append(process)
+        self._waiting=False
+        self._closed=False
+
+    def reset(self):
+        """
+        Resets every environment to the start of its next episode, and returns
+        the observations
+
+        The first reset plays episode 0 of every environment.
+        """
+        self._command(SHARED_RESET)
+        self.wait()
+        return self._obs
+
+    def step(self,actions):
+        """
+        Steps every environment, and returns the tuple (obs,rewards,dones)
+
+        The arrays are in shared memory, and are overwritten by the next step.
+
+        Parameter actions: The action of each environment
+        Precondition: actions is a sequence of getCount() actions, each one of
+        ENV_NOOP, ENV_LEFT, ENV_RIGHT, ENV_FIRE
+        """
+        self.send(actions)
+        self.wait()
+        return (self._obs,self._rewards,self._dones)
+
+    def send(self,actions):
+        """
+        Starts a step of every environment, without waiting for it to finish
+
+        The learner may work on anything but the shared arrays until it
+        calls wait.
+
+        Parameter actions: The action of each environment
+        Precondition: actions is a sequence of getCount() actions, each one of
+        ENV_NOOP, ENV_LEFT, ENV_RIGHT, ENV_FIRE
+        """
+        assert len(actions)==self._count
+        self._actions[:]=actions
+        self._command(SHARED_STEP)
+
+    def wait(self):
+        """
+        Waits until every worker has finished the step last sent
+
+        If a worker has died, this raises a RuntimeError rather than waiting
+        forever.
+        """
+        assert self._waiting, 'no step has been sent'
+        for _ in range(len(self._workers)):
+            while not self._finished.acquire(timeout=SHARED_POLL):
+                for process in self._workers:
+                    if not process.is_alive():
+                        self._waiting=False
+                        raise RuntimeError('%s exited with code %s' %
+                            (process.name,process.exitcode))
+        self._waiting=False
+        assert (self._control[2:]==self._control[1]).all()
+
+    def close(self):
+        """
+        Stops the workers and frees the shared memory
+
+        The arrays returned before must not be used after this.
+        """
+        if self._closed:
+            return
+        self._closed=True
+        if self._waiting:
+            try:
+                self.wait()
+            except RuntimeError:
+                pass
+        self._control[0]=SHARED_CLOSE
+        for go in self._go:
+            go.release()
+        for process in self._workers:
+            process.join(SHARED_CLOSE_WAIT)
+            if process.is_alive():
+                process.terminate()
+        self._obs=self._rewards=self._dones=self._actions=self._control=None
+        for block in self._blocks.values():
+            block.close()
+            block.unlink()
+
+    def _command(self,command):
+        """
+        Sends a command to every worker
+
+        Parameter command: The command
+        Precondition: command is SHARED_STEP or SHARED_RESET, and no step is
+        waiting
+        """
+        assert not self._closed and not self._waiting
+        self._control[0]=command
+        self._control[1]+=1
+        self._waiting=True
+        for go in self._go:
+            go.release()
+
+
+def _work(layout,worker,start,stop,count,seed,options,go,finished):
+    """
+    Runs the environments start..stop-1 in a worker process until closed
+
+    Parameter layout: The shared arrays, by name
+    Precondition: layout is a dictionary of tuples (block name,shape,dtype)
+
+    Parameter worker: The number of this worker
+    Precondition: worker is an int >= 0
+
+    Parameter start, stop: The environments of this worker
+    Precondition: start and stop are ints, 0 <= start < stop <= count
+
+    Parameter count: The number of environments
+    Precondition: count is an int > 0
+
+    Parameter seed: The seed of the first episode of environment 0
+    Precondition: seed is an int
+
+    Parameter options: The keyword arguments of each InvadersEnv
+    Precondition: options is a dictionary
+
+    Parameter go: The semaphore released to start a step
+    Precondition: go is a multiprocessing Semaphore
+
+    Parameter finished: The semaphore to release after a step
+    Precondition: finished is a multiprocessing Semaphore
+    """
+    blocks={name:shared_memory.SharedMemory(name=spec[0]) for name,spec in layout.items()}
+    arrays={name:np.ndarray(spec[1],np.dtype(spec[2]),buffer=blocks[name].buf)
+        for name,spec in layout.items()}
+    obs=arrays['obs']
+    rewards=arrays['rewards']
+    dones=arrays['dones']
+    actions=arrays['actions']
+    control=arrays['control']
+    envs=[InvadersEnv(**options) for _ in range(start,stop)]
+    episodes=[0]*len(envs)
+    try:
+        while True:
+            go.acquire()
+            command=int(control[0])
+            if command==SHARED_CLOSE:
+                break
+            for index,env in enumerate(envs):
+                number=start+index
+                if command==SHARED_RESET:
+                    obs[number]=env.reset(seed+number+episodes[index]*count)
+                    episodes[index]+=1
+                    rewards[number]=0
+                    dones[number]=False
+                    continue
+                observation,reward,done,info=env.step(int(actions[number]))
+                if done:
+                    observation=env.reset(seed+number+episodes[index]*count)
+                    episodes[index]+=1
+                obs[number]=observation
+                rewards[number]=reward
+                dones[number]=done
+            control[2+worker]=control[1]
+            finished.release()
+    finally:
+        del obs,rewards,dones,actions,control,arrays
+        for block in blocks.values():
+            block.close()
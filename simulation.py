@@ -0,0 +1,1390 @@
+"""
+Headless simulation module for Alien Invaders
+
+This module contains the simulation core for a single wave of Alien Invaders.
+It knows the rules of the game (ship movement, the marching formation, laser
+bolts, lives, score and the end of the wave) but nothing about Kivy. Nothing
+in this module creates a GObject, so a wave can be stepped on a machine with
+no display, thousands of frames at a time.
+
+The class Wave in wave.py is a thin drawing adapter over WaveSim. It passes
+the user input to the simulation and then moves its sprites to match.
+
+Peter Ng'ang'a Wainaina pnw6
+Iman Kiio iwk4
+6th December 2021
+"""
+from consts import *
+import numpy as np
+import random
+import math
+import struct
+import time
+import zlib
+
+# The start of every snapshot
+SNAPSHOT_MAGIC = b'AWSN'
+# The version of the snapshot format
+SNAPSHOT_VERSION = 2
+# Header: magic, version, rows, columns
+SNAPSHOT_HEADER = struct.Struct('<4sBHH')
+# State: origin x, origin y, ship x, _time, _deathTime, ship frame, movement,
+# _fireRate, _alienSteps, _shipDestroyed, _playerWon, lives, score, bolt count.
+# A missing ship or death time is NaN, and _playerWon None is -1.
+SNAPSHOT_STATE = struct.Struct('<dddddBBHIBbHII')
+# A bolt: x, y, last y, velocity
+SNAPSHOT_BOLT = struct.Struct('<dddd')
+# The generator: version, gauss_next (NaN for None), then 625 words of state
+SNAPSHOT_RNG = struct.Struct('<Bd')
+# The number of words in the state of a random.Random generator
+SNAPSHOT_RNG_WORDS = 625
+
+# PRIMARY RULE: The simulation is not allowed to access anything in any module
+# other than consts.py. In particular, it may never import game2d or models.py.
+
+
+class SimInput(object):
+    """
+    A class representing the keys held down during a single simulated frame.
+
+    WaveSim only ever asks its input whether a key is held down, so any object
+    with an is_key_down method will do (including GInput). This class is the
+    stand-in used when there is no window to read the keyboard from.
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _keys: the keys currently held down
+    # Invariant: _keys is a frozenset of strings
+
+    def __init__(self,keys=()):
+        """
+        Initializes the input with the given keys held down
+
+        Parameter keys: The keys held down
+        Precondition: keys is a sequence of strings (possibly empty)
+        """
+        assert all(isinstance(key,str) for key in keys)
+        self._keys=frozenset(keys)
+
+    def is_key_down(self,key):
+        """
+        Returns True if key is held down, False otherwise
+
+        Parameter key: The key to test
+        Precondition: key is a string
+        """
+        return key in self._keys
+
+
+class SimBolt(object):
+    """
+    A class representing a laser bolt in the simulation.
+
+    This is the headless counterpart of Bolt in models.py. It only tracks the
+    position of the bolt center and its velocity.
+    """
+    # INSTANCE ATTRIBUTES:
+    # Attribute x: the x-coordinate of the bolt center
+    # Invariant: x is a float
+    #
+    # Attribute y: the y-coordinate of the bolt center
+    # Invariant: y is a float
+    #
+    # Attribute lasty: the y-coordinate of the bolt center before its last move
+    # Invariant: lasty is a float
+    #
+    # Attribute _velocity: the velocity in y direction
+    # Invariant: _velocity is an int or float, and is not 0
+
+    def getVelocity(self):
+        """
+        Returns the velocity of the bolt
+        """
+        return self._velocity
+
+    def isPlayerBolt(self):
+        """
+        Return True if bolt velocity >0 False otherwise
+        """
+        return self._velocity>0
+
+    def __init__(self,x_c,y_c,v):
+        """
+        Initializes a new bolt
+
+        Parameter x_c: The x-coordinate of the bolt center
+        Precondition: x_c must be a number (int or float)
+
+        Parameter y_c: The y-coordinate of the bolt center
+        Precondition: y_c must be a number (int or float)
+
+        Parameter v: The velocity of the bolt
+        Precondition: v is a non-zero number (int or float)
+        """
+        assert isinstance(x_c,int) or isinstance(x_c,float)
+        assert isinstance(y_c,int) or isinstance(y_c,float)
+        assert (isinstance(v,int) or isinstance(v,float)) and v!=0
+        self.x=float(x_c)
+        self.y=float(y_c)
+        self.lasty=self.y
+        self._velocity=v
+
+
+class BoltStore(object):
+    """
+    A class holding the bolts currently on screen.
+
+    The active bolts are always packed at the front of the store. Removing a
+    bolt during an update phase only marks it (with discard), so the phase
+    can keep walking the store by index without skipping anything. When the
+    phase is over, compact removes every marked bolt in one pass by moving
+    the last active bolt into its slot. Removal is O(1), and a whole phase
+    is linear in the number of bolts.
+
+    The store also counts the player bolts, since the player may only have
+    one on screen at a time.
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _items: the bolts, active ones first
+    # Invariant: _items is a list of SimBolt objects (or None past _count)
+    #
+    # Attribute _count: the number of active bolts
+    # Invariant: _count is an int in 0..len(_items)
+    #
+    # Attribute _discarded: the indices marked for removal
+    # Invariant: _discarded is a list of distinct ints in 0.._count-1
+    #
+    # Attribute _players: the number of active player bolts
+    # Invariant: _players is an int >= 0
+
+    def __init__(self):
+        """
+        Initializes an empty store
+        """
+        self._items=[]
+        self._count=0
+        self._discarded=[]
+        self._players=0
+
+    def __len__(self):
+        """
+        Returns the number of active bolts (including any marked for removal)
+        """
+        return self._count
+
+    def __getitem__(self,index):
+        """
+        Returns the active bolt at index
+
+        Parameter index: The index of the bolt
+        Precondition: index is an int in 0..len(self)-1
+        """
+        assert 0<=index<self._count
+        return self._items[index]
+
+    def __iter__(self):
+        """
+        Returns an iterator over the active bolts
+        """
+        for index in range(self._count):
+            yield self._items[index]
+
+    def playerCount(self):
+        """
+        Returns the number of active player bolts
+        """
+        return self._players
+
+    def add(self,bolt):
+        """
+        Adds a bolt to the end of the active bolts
+
+        Parameter bolt: The bolt to add
+        Precondition: bolt is a SimBolt not already in the store
+        """
+        assert isinstance(bolt,SimBolt)
+        if self._count<len(self._items):
+            self._items[self._count]=bolt
+        else:
+            self._items.append(bolt)
+        self._count+=1
+        if bolt.isPlayerBolt():
+            self._players+=1
+
+    def discard(self,index):
+        """
+        Marks the active bolt at index for removal at the next compact
+
+        Parameter index: The index of the bolt
+        Precondition: index is an int in 0..len(self)-1 that is not already marked
+        """
+        assert 0<=index<self._count
+        self._discarded.append(index)
+
+    def compact(self):
+        """
+        Removes every bolt marked by discard, moving the last active bolts into their slots
+        """
+        #remove from the back, so a moved bolt is never one still to be removed
+        self._discarded.sort(reverse=True)
+        for index in self._discarded:
+            if self._items[index].isPlayerBolt():
+                self._players-=1
+            self._count-=1
+            self._items[index]=self._items[self._count]
+            self._items[self._count]=None
+        self._discarded=[]
+
+    def clear(self):
+        """
+        Removes every bolt
+        """
+        for index in range(self._count):
+            self._items[index]=None
+        self._count=0
+        self._discarded=[]
+        self._players=0
+
+
+class SpatialHash(object):
+    """
+    A class to find the rectangles near a point without testing all of them.
+
+    Space is cut into cells of a fixed size, and each rectangle is filed
+    under every cell it overlaps. A query only looks at the cells under the
+    query box, so its cost depends on the size of the box and not on the
+    number of rectangles.
+
+    WaveSim indexes a regular formation by arithmetic alone. This class is
+    for formations whose aliens do not sit on a regular grid (a WaveSim made
+    with offsets).
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _cellWidth: the width of a cell
+    # Invariant: _cellWidth is a float > 0
+    #
+    # Attribute _cellHeight: the height of a cell
+    # Invariant: _cellHeight is a float > 0
+    #
+    # Attribute _cells: the keys filed under each cell
+    # Invariant: _cells is a dictionary mapping (column,row) pairs of ints to
+    # sets of keys
+    #
+    # Attribute _spans: the cells each key is filed under
+    # Invariant: _spans is a dictionary mapping keys to (c0,r0,c1,r1) tuples
+
+    def __init__(self,cellWidth,cellHeight):
+        """
+        Initializes an empty spatial hash
+
+        Parameter cellWidth: The width of a cell
+        Precondition: cellWidth is a number (int or float) > 0
+
+        Parameter cellHeight: The height of a cell
+        Precondition: cellHeight is a number (int or float) > 0
+        """
+        assert (isinstance(cellWidth,int) or isinstance(cellWidth,float)) and cellWidth>0
+        assert (isinstance(cellHeight,int) or isinstance(cellHeight,float)) and cellHeight>0
+        self._cellWidth=float(cellWidth)
+        self._cellHeight=float(cellHeight)
+        self._cells={}
+        self._spans={}
+
+    def insert(self,key,x,y,width,height):
+        """
+        Files the rectangle with the given center and size under key
+
+        Parameter key: The key for the rectangle
+        Precondition: key is a hashable value that is not already in the hash
+
+        Parameter x: The x-coordinate of the rectangle center
+        Precondition: x is a number (int or float)
+
+        Parameter y: The y-coordinate of the rectangle center
+        Precondition: y is a number (int or float)
+
+        Parameter width: The rectangle width
+        Precondition: width is a number > 0
+
+        Parameter height: The rectangle height
+        Precondition: height is a number > 0
+        """
+        assert not key in self._spans
+        span=self._span(x-width/2,y-height/2,x+width/2,y+height/2)
+        self._spans[key]=span
+        for column in range(span[0],span[2]+1):
+            for row in range(span[1],span[3]+1):
+                self._cells.setdefault((column,row),set()).add(key)
+
+    def remove(self,key):
+        """
+        Removes the rectangle filed under key
+
+        Parameter key: The key for the rectangle
+        Precondition: key is in the hash
+        """
+        span=self._spans.pop(key)
+        for column in range(span[0],span[2]+1):
+            for row in range(span[1],span[3]+1):
+                cell=self._cells[(column,row)]
+                cell.discard(key)
+                if len(cell)==0:
+                    del self._cells[(column,row)]
+
+    def query(self,left,bottom,right,top):
+        """
+        Returns a set of the keys whose cells overlap the given box
+
+        The result may contain rectangles that do not actually touch the box;
+        it never misses one that does.
+
+        Parameter left: The left edge of the box
+        Precondition: left is a number (int or float)
+
+        Parameter bottom: The bottom edge of the box
+        Precondition: bottom is a number (int or float)
+
+        Parameter right: The right edge of the box
+        Precondition: right is a number >= left
+
+        Parameter top: The top edge of the box
+        Precondition: top is a number >= bottom
+        """
+        span=self._span(left,bottom,right,top)
+        found=set()
+        for column in range(span[0],span[2]+1):
+            for row in range(span[1],span[3]+1):
+                cell=self._cells.get((column,row))
+                if not cell is None:
+                    found|=cell
+        return found
+
+    def _span(self,left,bottom,right,top):
+        """
+        Returns the (c0,r0,c1,r1) range of cells overlapped by the given box
+
+        Parameter left: The left edge of the box
+        Precondition: left is a number (int or float)
+
+        Parameter bottom: The bottom edge of the box
+        Precondition: bottom is a number (int or float)
+
+        Parameter right: The right edge of the box
+        Precondition: right is a number >= left
+
+        Parameter top: The top edge of the box
+        Precondition: top is a number >= bottom
+        """
+        return (int(left//self._cellWidth),int(bottom//self._cellHeight),
+                int(right//self._cellWidth),int(top//self._cellHeight))
+
+
+class WaveSim(object):
+    """
+    This class simulates a single level or wave of Alien Invaders.
+
+    It follows exactly the rules of the wave: the ship wraps around the
+    screen, the aliens march back and forth dropping at the edges, the
+    player has one bolt on screen at a time, and the wave ends when every
+    alien is dead, an alien crosses the defense line, or the lives run out.
+
+    The aliens are kept as fixed offsets inside a formation. Only the origin
+    of the formation moves as the aliens march, so a step is a single
+    update no matter how many aliens are left. Everything else is in the
+    same coordinates as the game window.
+
+    The formation is stored as numpy arrays (one entry per alien, row 0 at
+    the top) with a mask of the aliens still alive, so questions about the
+    whole formation are array reductions rather than loops.
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _rows: the number of rows of aliens
+    # Invariant: _rows is an int > 0
+    #
+    # Attribute _columns: the number of aliens per row
+    # Invariant: _columns is an int > 0
+    #
+    # Attribute _alienSpeed: the number of seconds between alien steps
+    # Invariant: _alienSpeed is a float > 0
+    #
+    # Attribute _boltRate: the most alien steps between alien bolts
+    # Invariant: _boltRate is an int > 0
+    #
+    # Attribute _boltSpeed: the number of pixels a bolt moves per update
+    # Invariant: _boltSpeed is a number > 0
+    #
+    # Attribute _shipx: the x-coordinate of the ship center
+    # Invariant: _shipx is a float, or None if there is no ship
+    #
+    # Attribute _shipFrame: the current frame of the ship explosion
+    # Invariant: _shipFrame is an int in 0..SHIP_FRAMES-1
+    #
+    # Attribute _originx: the x-coordinate of the formation origin
+    # Invariant: _originx is a float
+    #
+    # Attribute _originy: the y-coordinate of the formation origin
+    # Invariant: _originy is a float
+    #
+    # Attribute _alienx: the x-coordinates of the aliens relative to the origin
+    # Invariant: _alienx is a _rows x _columns numpy array of floats
+    #
+    # Attribute _alieny: the y-coordinates of the aliens relative to the origin
+    # Invariant: _alieny is a _rows x _columns numpy array of floats
+    #
+    # Attribute _images: the alien image indices
+    # Invariant: _images is a _rows x _columns numpy array of valid
+    # ALIEN_IMAGES indices
+    #
+    # Attribute _alive: which aliens are still alive
+    # Invariant: _alive is a _rows x _columns numpy array of bools
+    #
+    # Attribute _aliveCount: the number of living aliens
+    # Invariant: _aliveCount is an int, equal to the number of True in _alive
+    #
+    # Attribute _rowCounts: the number of living aliens in each row
+    # Invariant: _rowCounts is a numpy array of _rows ints >= 0
+    #
+    # Attribute _columnCounts: the number of living aliens in each column
+    # Invariant: _columnCounts is a numpy array of _columns ints >= 0
+    #
+    # Attribute _leftColumn: the left most column with a living alien
+    # Invariant: _leftColumn is an int in 0.._columns-1 (meaningless
+    # once _aliveCount is 0)
+    #
+    # Attribute _rightColumn: the right most column with a living alien
+    # Invariant: _rightColumn is an int in 0.._columns-1 (meaningless
+    # once _aliveCount is 0)
+    #
+    # Attribute _lowestRow: the bottom most row with a living alien
+    # Invariant: _lowestRow is an int in 0.._rows-1 (meaningless once
+    # _aliveCount is 0)
+    #
+    # Attribute _bottomRow: the bottom most living alien in each column
+    # Invariant: _bottomRow is a numpy array of _columns ints, each in
+    # 0.._rows-1, or -1 for an empty column. It is the row of the living alien
+    # with the lowest y offset in the column (the last living row in a
+    # regular formation).
+    #
+    # Attribute _shooters: the columns that still have a living alien
+    # Invariant: _shooters is a list of ints in 0.._columns-1, in order
+    #
+    # Attribute _columnLeft: the left edge offset of the aliens in each column
+    # Invariant: _columnLeft is a numpy array of _columns floats
+    #
+    # Attribute _columnRight: the right edge offset of the aliens in each column
+    # Invariant: _columnRight is a numpy array of _columns floats
+    #
+    # Attribute _rowBottom: the bottom edge offset of the aliens in each row
+    # Invariant: _rowBottom is a numpy array of _rows floats
+    #
+    # Attribute _edgeLeft: the left edge offset of the living aliens
+    # Invariant: _edgeLeft is a float (meaningless once _aliveCount is 0)
+    #
+    # Attribute _edgeRight: the right edge offset of the living aliens
+    # Invariant: _edgeRight is a float (meaningless once _aliveCount is 0)
+    #
+    # Attribute _edgeBottom: the bottom edge offset of the living aliens
+    # Invariant: _edgeBottom is a float (meaningless once _aliveCount is 0)
+    #
+    # Attribute _hash: the index of the living aliens for a formation that is
+    # not a regular grid
+    # Invariant: _hash is a SpatialHash keyed by row*_columns+column, or
+    # None if the alien at row and column is at (column*ALIEN_PITCH_X,
+    # -row*ALIEN_PITCH_Y)
+    #
+    # The counts and bounds above are updated on each kill, so that no
+    # per-frame check has to scan the formation.
+    #
+    # Attribute _bolts: the laser bolts currently on screen
+    # Invariant: _bolts is a BoltStore, with nothing marked for removal
+    # between update phases
+    #
+    # Attribute _lives: the number of lives left
+    # Invariant: _lives is an int >= 0
+    #
+    # Attribute _time: the amount of time since the last Alien "step"
+    # Invariant: _time is a float >= 0s (it is <= _alienSpeed after each step)
+    #
+    # Attribute _movement: horizontal alien motion
+    # Invariant: _movement is a string, either "right" or "left"
+    #
+    # Attribute _fireRate: number of steps to take before next alien bolt
+    # Invariant: _fireRate is an int in 1.._boltRate
+    #
+    # Attribute _alienSteps: number of steps by aliens since last bolt was fired
+    # Invariant: _alienSteps is an int >= 0
+    #
+    # Attribute _deathTime: time spent so far on the ship explosion
+    # Invariant: _deathTime is a float >= 0, or None if the ship is not exploding
+    #
+    # Attribute _shipDestroyed: whether existing ship is destroyed
+    # Invariant: _shipDestroyed is a boolean
+    #
+    # Attribute _playerWon: whether the player has won
+    # Invariant: _playerWon is a boolean indicating endgame or None as game progresses
+    #
+    # Attribute _playerScore: number of aliens killed
+    # Invariant: _playerScore is an int >= 0
+    #
+    # Attribute _rng: the source of every random choice in the wave
+    # Invariant: _rng is a random.Random object
+    #
+    # Attribute _events: what happened during the last call to update
+    # Invariant: _events is a list of event tuples (see getEvents)
+    #
+    # Attribute _profiler: the profiler timing the phases of update
+    # Invariant: _profiler is a PhaseProfiler, or None if profiling is off
+
+    # GETTERS AND SETTERS
+    def getShipX(self):
+        """
+        Returns the x-coordinate of the ship center, or None if there is no ship
+        """
+        return self._shipx
+
+    def getShipFrame(self):
+        """
+        Returns the current frame of the ship explosion
+        """
+        return self._shipFrame
+
+    def getRows(self):
+        """
+        Returns the number of rows of aliens
+        """
+        return self._rows
+
+    def getColumns(self):
+        """
+        Returns the number of aliens per row
+        """
+        return self._columns
+
+    def getFormationOrigin(self):
+        """
+        Returns the (x,y) position of the formation origin in the game window
+        """
+        return (self._originx,self._originy)
+
+    def getAlien(self,row,column):
+        """
+        Returns the (x,y) center of the alien at row and column, or None if it is dead
+
+        The center is relative to the formation origin, and does not change
+        as the aliens march.
+
+        Parameter row: The row of the alien (0 is the top row)
+        Precondition: row is an int in 0..getRows()-1
+
+        Parameter column: The column of the alien (0 is the left column)
+        Precondition: column is an int in 0..getColumns()-1
+        """
+        if not self._alive[row,column]:
+            return None
+        return (float(self._alienx[row,column]),float(self._alieny[row,column]))
+
+    def getAlienImage(self,row,column):
+        """
+        Returns the index in ALIEN_IMAGES of the alien at row and column
+
+        Parameter row: The row of the alien (0 is the top row)
+        Precondition: row is an int in 0..getRows()-1
+
+        Parameter column: The column of the alien (0 is the left column)
+        Precondition: column is an int in 0..getColumns()-1
+        """
+        return int(self._images[row,column])
+
+    def getAlienPositions(self):
+        """
+        Returns the (x,y) arrays of alien centers, relative to the formation origin
+
+        Each array is getRows() x getColumns(), and includes dead aliens (see
+        getAlive). The arrays are owned by the simulation and must not be
+        modified.
+        """
+        return (self._alienx,self._alieny)
+
+    def isRegular(self):
+        """
+        Returns True if the aliens sit on the usual grid, False otherwise
+
+        In a regular formation every alien in a column has the same x offset,
+        and every alien in a row has the same y offset.
+        """
+        return self._hash is None
+
+    def getAlienImages(self):
+        """
+        Returns the getRows() x getColumns() array of alien image indices
+
+        The array is owned by the simulation and must not be modified.
+        """
+        return self._images
+
+    def getAlive(self):
+        """
+        Returns the getRows() x getColumns() mask of the aliens still alive
+
+        The array is owned by the simulation and must not be modified.
+        """
+        return self._alive
+
+    def getAliveCount(self):
+        """
+        Returns the number of aliens still alive
+        """
+        return self._aliveCount
+
+    def getRandomState(self):
+        """
+        Returns the state of the random number generator
+
+        Passing the result to setRandomState puts the generator back exactly
+        where it was, so a run can be repeated from this point.
+        """
+        return self._rng.getstate()
+
+    def setRandomState(self,state):
+        """
+        Restores the random number generator to a state from getRandomState
+
+        Parameter state: The generator state
+        Precondition: state was returned by getRandomState
+        """
+        self._rng.setstate(state)
+
+    def getEvents(self):
+        """
+        Returns the list of events from the last call to update, in order
+
+        Each event is a tuple starting with its kind:
+            (EVENT_KILL,row,column) when a player bolt kills an alien
+            (EVENT_SHIP_HIT,) when an alien bolt destroys the ship
+            (EVENT_FIRE,player) when a bolt is fired, where player is True
+            for a player bolt and False for an alien bolt
+
+        The list is owned by the simulation and must not be modified.
+        """
+        return self._events
+
+    def getProfiler(self):
+        """
+        Returns the profiler timing the phases of update, or None if it is off
+        """
+        return self._profiler
+
+    def setProfiler(self,profiler):
+        """
+        Sets the profiler timing the phases of update
+
+        Profiling is off by default, and update then does no timing at all.
+
+        Parameter profiler: The profiler to record into
+        Precondition: profiler has a method add like PhaseProfiler (see
+        profiler.py), or is None to turn profiling off
+        """
+        assert profiler is None or hasattr(profiler,'add')
+        self._profiler=profiler
+
+    def snapshot(self):
+        """
+        Returns the complete state of the wave as compact bytes
+
+        The bytes hold everything that changes during a wave: the living
+        aliens, the formation origin and march, the bolts, the ship and its
+        explosion, lives, score, and the state of the random number generator.
+        The settings given to the initializer are not included; restore the
+        bytes into a simulation with the same settings.
+        """
+        parts=[SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC,SNAPSHOT_VERSION,self._rows,self._columns),
+            self._pack_state(),np.packbits(self._alive).tobytes()]
+        version,words,gauss=self._rng.getstate()
+        parts.append(SNAPSHOT_RNG.pack(version,_or_nan(gauss)))
+        parts.append(np.array(words,dtype='<u4').tobytes())
+        #the bolts go last, so that everything before them has a fixed place
+        for bolt in self._bolts:
+            parts.append(SNAPSHOT_BOLT.pack(bolt.x,bolt.y,bolt.lasty,bolt.getVelocity()))
+        return b''.join(parts)
+
+    def restore(self,data):
+        """
+        Restores the wave to the state in data
+
+        The counts and bounds of the formation are rebuilt from the living
+        aliens, so restoring costs about as much as one update per alien row.
+        The events of the last update are cleared.
+
+        Parameter data: The wave state
+        Precondition: data is a bytes object returned by snapshot, from a
+        simulation with the same settings as this one
+        """
+        magic,version,rows,columns=SNAPSHOT_HEADER.unpack_from(data,0)
+        assert magic==SNAPSHOT_MAGIC, 'data is not a wave snapshot'
+        assert version==SNAPSHOT_VERSION, 'unsupported snapshot version %d' % version
+        assert (rows,columns)==(self._rows,self._columns), \
+            'snapshot of %d rows of %d aliens' % (rows,columns)
+        pos=SNAPSHOT_HEADER.size
+        (self._originx,self._originy,shipx,self._time,deathTime,self._shipFrame,
+            movement,self._fireRate,self._alienSteps,destroyed,won,self._lives,
+            self._playerScore,bolts)=SNAPSHOT_STATE.unpack_from(data,pos)
+        pos+=SNAPSHOT_STATE.size
+        self._shipx=None if math.isnan(shipx) else shipx
+        self._deathTime=None if math.isnan(deathTime) else deathTime
+        self._movement="right" if movement==0 else "left"
+        self._shipDestroyed=bool(destroyed)
+        self._playerWon=None if won<0 else bool(won)
+
+        size=self._rows*self._columns
+        packed=np.frombuffer(data,dtype=np.uint8,count=(size+7)//8,offset=pos)
+        pos+=(size+7)//8
+        self._alive=np.unpackbits(packed,count=size).astype(bool).reshape(self._rows,self._columns)
+        self._reindex()
+
+        version,gauss=SNAPSHOT_RNG.unpack_from(data,pos)
+        pos+=SNAPSHOT_RNG.size
+        words=np.frombuffer(data,dtype='<u4',count=SNAPSHOT_RNG_WORDS,offset=pos)
+        pos+=4*SNAPSHOT_RNG_WORDS
+        self._rng.setstate((version,tuple(words.tolist()),None if math.isnan(gauss) else gauss))
+
+        self._bolts.clear()
+        for _ in range(bolts):
+            x,y,lasty,v=SNAPSHOT_BOLT.unpack_from(data,pos)
+            pos+=SNAPSHOT_BOLT.size
+            bolt=SimBolt(x,y,v)
+            bolt.lasty=lasty
+            self._bolts.add(bolt)
+        self._events=[]
+
+    def getStateHash(self,previous=0):
+        """
+        Returns a hash of the state of the wave, chained onto previous
+
+        The hash covers the formation, the bolts, the ship, lives, score and
+        the march and fire counters. Chaining the hash of every update onto the
+        last one gives a rolling hash of the whole run, which differs from the
+        first update where two runs part ways. The generator state is left
+        out to keep this cheap; a difference in it shows up as soon as it
+        changes a bolt.
+
+        Parameter previous: The hash to chain onto
+        Precondition: previous is an int in 0..2**32-1
+        """
+        value=zlib.crc32(self._pack_state(),previous)
+        value=zlib.crc32(self._alive.tobytes(),value)
+        for bolt in self._bolts:
+            value=zlib.crc32(SNAPSHOT_BOLT.pack(bolt.x,bolt.y,bolt.lasty,bolt.getVelocity()),value)
+        return value
+
+    def addBolt(self,x_c,y_c,v):
+        """
+        Adds a bolt to the wave, outside of the normal rules for firing
+
+        This is for setting up workloads (benchmarks and tests). A player bolt
+        added this way still counts against the one player bolt on screen.
+
+        Parameter x_c: The x-coordinate of the bolt center
+        Precondition: x_c must be a number (int or float)
+
+        Parameter y_c: The y-coordinate of the bolt center
+        Precondition: y_c must be a number (int or float)
+
+        Parameter v: The velocity of the bolt
+        Precondition: v is a non-zero number (int or float)
+        """
+        self._bolts.add(SimBolt(x_c,y_c,v))
+
+    def getBolts(self):
+        """
+        Returns the BoltStore of the bolts currently on screen
+
+        The store is owned by the simulation and must not be modified.
+        """
+        return self._bolts
+
+    def isShipDestroyed(self):
+        """
+        Returns True if the ship is destroyed, False otherwise
+        """
+        return self._shipDestroyed
+
+    def resetShipDestroyed(self):
+        """
+        Sets _shipDestroyed to False
+        """
+        self._shipDestroyed=False
+
+    def isLifeLeft(self):
+        """
+        Returns True is _lives is greater than 0 False otherwise
+        """
+        return self._lives>0
+
+    def getLives(self):
+        """
+        Returns the number of player lives left
+        """
+        return self._lives
+
+    def createNewShip(self):
+        """
+        Creates a new ship at the original position
+        """
+        self._shipx=GAME_WIDTH/2
+        self._shipFrame=0
+
+    def hasPlayerWon(self):
+        """
+        Return True if player has won, False if player has lost, or None if game is not over yet
+        """
+        return self._playerWon
+
+    def getScore(self):
+        """
+        Return the current player Score
+        """
+        return (self._playerScore*10)
+
+    # INITIALIZER
+    def __init__(self,rng=None,rows=ALIEN_ROWS,columns=ALIENS_IN_ROW,alienSpeed=ALIEN_SPEED,
+                 boltRate=BOLT_RATE,boltSpeed=BOLT_SPEED,lives=SHIP_LIVES,offsets=None):
+        """
+        Initializes a new wave simulation
+
+        The settings default to the constants in consts.py. They can be given
+        here so that waves with different settings can be played side by side
+        (for benchmarks or balancing runs).
+
+        Every random choice in the wave (when the aliens fire and which alien
+        fires) is drawn from rng. Two simulations given generators in the same
+        state and the same inputs play out identically, and each simulation
+        can have its own stream, even in the same process.
+
+        Parameter rng: The random number generator for this wave
+        Precondition: rng is a random.Random object, or None for a new
+        generator seeded by the operating system
+
+        Parameter rows: The number of rows of aliens
+        Precondition: rows is an int > 0
+
+        Parameter columns: The number of aliens per row
+        Precondition: columns is an int > 0
+
+        Parameter alienSpeed: The number of seconds between alien steps
+        Precondition: alienSpeed is a number (int or float) > 0
+
+        Parameter boltRate: The most alien steps between alien bolts
+        Precondition: boltRate is an int > 0
+
+        Parameter boltSpeed: The number of pixels a bolt moves per update
+        Precondition: boltSpeed is a number (int or float) > 0
+
+        Parameter lives: The number of lives the player starts with
+        Precondition: lives is an int > 0
+
+        Parameter offsets: The (x,y) centers of the aliens relative to the
+        formation origin (the top left alien), for a layout that is not the
+        usual grid. Such a formation is indexed with a SpatialHash.
+        Precondition: offsets is None (for the grid of ALIEN_PITCH_X by
+        ALIEN_PITCH_Y), or a pair of rows x columns numpy arrays of numbers
+        """
+        assert rng is None or isinstance(rng,random.Random)
+        assert isinstance(rows,int) and rows>0
+        assert isinstance(columns,int) and columns>0
+        assert (isinstance(alienSpeed,int) or isinstance(alienSpeed,float)) and alienSpeed>0
+        assert isinstance(boltRate,int) and boltRate>0
+        assert (isinstance(boltSpeed,int) or isinstance(boltSpeed,float)) and boltSpeed>0
+        assert isinstance(lives,int) and lives>0
+        assert offsets is None or (len(offsets)==2 and
+            all(np.shape(array)==(rows,columns) for array in offsets))
+        self._rng=random.Random() if rng is None else rng
+        self._rows=rows
+        self._columns=columns
+        self._alienSpeed=float(alienSpeed)
+        self._boltRate=boltRate
+        self._boltSpeed=boltSpeed
+        #the origin is the center of the top left alien
+        self._originx=ALIEN_H_SEP+(ALIEN_WIDTH/2)
+        self._originy=float(GAME_HEIGHT-ALIEN_CEILING)
+        rows=np.arange(self._rows)
+        columns=np.arange(self._columns)
+        if offsets is None:
+            self._alienx=np.tile(columns*float(ALIEN_PITCH_X),(self._rows,1))
+            self._alieny=np.tile((rows*-float(ALIEN_PITCH_Y))[:,None],(1,self._columns))
+        else:
+            self._alienx=np.array(offsets[0],dtype=float)
+            self._alieny=np.array(offsets[1],dtype=float)
+        #find image to use based on row
+        images=np.where(rows%2==0,(rows+1)//2,rows//2)%len(ALIEN_IMAGES)
+        self._images=np.tile(images[:,None],(1,self._columns))
+        self._alive=np.ones((self._rows,self._columns),dtype=bool)
+        self._aliveCount=self._rows*self._columns
+        self._rowCounts=np.full(self._rows,self._columns)
+        self._columnCounts=np.full(self._columns,self._rows)
+        self._leftColumn=0
+        self._rightColumn=self._columns-1
+        self._lowestRow=self._rows-1
+        self._bottomRow=np.full(self._columns,self._rows-1)
+        self._shooters=list(range(self._columns))
+        #edges of each column and row are fixed, since the offsets never change
+        self._columnLeft=(self._alienx-ALIEN_WIDTH/2).min(axis=0)
+        self._columnRight=(self._alienx+ALIEN_WIDTH/2).max(axis=0)
+        self._rowBottom=(self._alieny-ALIEN_HEIGHT/2).min(axis=1)
+        self._hash=None
+        if not self._is_regular():
+            self._hash=SpatialHash(ALIEN_PITCH_X,ALIEN_PITCH_Y)
+            for row in range(self._rows):
+                for column in range(self._columns):
+                    self._hash.insert(row*self._columns+column,self._alienx[row,column],
+                                      self._alieny[row,column],ALIEN_WIDTH,ALIEN_HEIGHT)
+            self._bottomRow=np.array([self._lowest_alive(column) for column in range(self._columns)])
+        self._update_edges()
+
+        self.createNewShip()
+        self._time=0
+        self._movement="right"
+        self._bolts=BoltStore()
+        self._fireRate=self._rng.randint(1,self._boltRate)
+        self._alienSteps=0
+        self._deathTime=None
+        self._shipDestroyed=False
+        self._lives=lives
+        self._playerWon=None
+        self._playerScore=0
+        self._events=[]
+        self._profiler=None
+
+    # UPDATE METHOD
+    def update(self,input,dt):
+        """
+        Simulates a single frame in the wave
+
+        If a profiler is set, the time of each phase is recorded in it. A
+        phase that does not run this frame is recorded as None.
+
+        Parameter input: The input from the User
+        Precondition: input has a method is_key_down (e.g. GInput or SimInput)
+
+        Parameter dt: The time in seconds since last update
+        Precondition: dt is a number (int or float)
+        """
+        assert hasattr(input,'is_key_down')
+        assert isinstance(dt,int) or isinstance(dt,float)
+
+        self._events=[]
+        #float() is 0.0, so a clock that costs next to nothing when not profiling
+        clock=float if self._profiler is None else time.perf_counter
+        moveShip=fire=moveAliens=None
+        if not self._deathTime is None:
+            self._animate_death(dt)
+        elif not self._shipx is None:
+            start=clock()
+            self._move_ship(input)
+            middle=clock()
+            self._fire(input)
+            end=clock()
+            moveShip=middle-start
+            fire=end-middle
+        #move aliens and maybe fire
+        if self._aliens_exist():
+            start=clock()
+            self._move_aliens(dt)
+            moveAliens=clock()-start
+        #move bolts
+        start=clock()
+        self._move_bolt()
+        bolts=clock()
+        #check for colision
+        self._collides()
+        collides=clock()
+        #check game ending
+        self._checkEnd()
+        end=clock()
+        if not self._profiler is None:
+            self._profiler.add(moveShip,fire,moveAliens,bolts-start,collides-bolts,end-collides)
+
+    # HELPER METHODS
+    def _move_ship(self,input):
+        """
+        Moves the ship left or right as specified by player via input
+
+        Parameter input: User Input
+        Precondition: input has a method is_key_down
+        """
+        #ship wraps around screen
+        if self._shipx>(GAME_WIDTH-(0.5*SHIP_WIDTH)):
+            self._shipx=0.5*SHIP_WIDTH
+        elif self._shipx<0.5*SHIP_WIDTH:
+            self._shipx=GAME_WIDTH-(0.5*SHIP_WIDTH)
+        else:
+            if input.is_key_down("right"):
+                self._shipx+=SHIP_MOVEMENT
+            if input.is_key_down("left"):
+                self._shipx-=SHIP_MOVEMENT
+
+    def _fire(self,input):
+        """
+        Fires a bolt from the player if there is no player bolt on screen
+
+        Parameter input: The input from the User
+        Precondition: input has a method is_key_down
+        """
+        if input.is_key_down("up") and self._bolts.playerCount()==0:
+            self._bolts.add(SimBolt(self._shipx,SHIP_Y+SHIP_HEIGHT/2+BOLT_HEIGHT/2,self._boltSpeed))
+            self._events.append((EVENT_FIRE,True))
+
+    def _move_aliens(self,dt):
+        """
+        Moves the aliens, firing an alien bolt every _fireRate steps
+
+        Parameter dt: Time since the last update
+        Precondition: dt must be a number (int or float)
+        """
+        if self._alienSteps==self._fireRate:
+            self._alienSteps=0
+            self._fireRate=self._rng.randint(1,self._boltRate)
+            pos=self._alien_to_fire()
+            x=self._originx+pos[0]
+            y=self._originy+pos[1]-(ALIEN_HEIGHT/2+BOLT_HEIGHT/2)
+            self._bolts.add(SimBolt(x,y,-self._boltSpeed))
+            self._events.append((EVENT_FIRE,False))
+
+        self._time+=dt
+        if self._time>self._alienSpeed:
+            self._alienSteps+=1
+            #keep the remainder, so steps do not drift with the frame rate
+            self._time-=self._alienSpeed
+            if self._movement=="right":
+                self._originx+=ALIEN_H_WALK
+            else:
+                self._originx-=ALIEN_H_WALK
+        #determine whether to move down
+        if self._movement=="right":
+            if (GAME_WIDTH-(self._originx+self._edgeRight))<ALIEN_H_SEP:
+                self._movement="left"
+                self._originy-=ALIEN_V_WALK
+        elif ALIEN_H_SEP>(self._originx+self._edgeLeft):
+            self._movement="right"
+            self._originy-=ALIEN_V_WALK
+
+    def _alien_to_fire(self):
+        """
+        Returns the (x,y) center of a random alien at the bottom of its column
+
+        Every column with a living alien is equally likely. The center is
+        relative to the formation origin.
+        """
+        column=self._rng.choice(self._shooters)
+        row=self._bottomRow[column]
+        return (self._alienx[row,column],self._alieny[row,column])
+
+    def _move_bolt(self):
+        """
+        Moves all existing bolts, remembering where each one started
+
+        Bolts that leave the screen are removed by _collides, once the path
+        they covered this step has been tested.
+        """
+        for bolt in self._bolts:
+            bolt.lasty=bolt.y
+            if bolt.isPlayerBolt():
+                bolt.y+=(bolt.getVelocity()+BOLT_HEIGHT/2)
+            else:
+                bolt.y+=(bolt.getVelocity()-BOLT_HEIGHT/2)
+
+    def _collides(self):
+        """
+        Checks every bolt for a collision in one sweep, removing bolts that hit something.
+
+        Each bolt is tested over the whole path it covered in the last move
+        (not just where it ended up), so fast bolts cannot skip through a
+        target. Player bolts kill the first alien on their path and alien
+        bolts destroy the ship. A ship that is already exploding cannot be
+        hit again. Each hit is added to _events. Bolts that missed and have
+        left the screen are removed as well.
+        """
+        targets=self._aliveCount>0
+        ship=not self._shipx is None and self._deathTime is None
+        for index in range(len(self._bolts)):
+            bolt=self._bolts[index]
+            if bolt.isPlayerBolt():
+                hit=targets and self._alien_collides(bolt)
+                targets=self._aliveCount>0
+                gone=(bolt.y-BOLT_HEIGHT/2)>GAME_HEIGHT
+            else:
+                hit=ship and self._ship_collides(bolt)
+                ship=ship and not hit
+                gone=(bolt.y+BOLT_HEIGHT/2)<0
+            if hit or gone:
+                self._bolts.discard(index)
+        self._bolts.compact()
+
+    def _aliens_exist(self):
+        """
+        Returns True if there is at least one living alien, False otherwise
+        """
+        return self._aliveCount>0
+
+    def _alien_collides(self,bolt):
+        """
+        Returns True if the player bolt kills an alien, False otherwise. Updates _playerScore
+
+        Parameter bolt: Player bolt to check for collision with
+        Precondition: bolt is a SimBolt, and must be a player bolt
+        """
+        #move the bolt into formation space once
+        x=bolt.x-self._originx
+        y0=bolt.lasty-self._originy
+        y1=bolt.y-self._originy
+        #candidates come bottom row first, the order the bolt meets them
+        for row,column in self._candidates(x,y0,y1):
+            if self._alive[row,column] and \
+                _bolt_sweeps(x,y0,y1,self._alienx[row,column],self._alieny[row,column],ALIEN_WIDTH,ALIEN_HEIGHT):
+                self._kill(row,column)
+                self._playerScore+=1
+                self._events.append((EVENT_KILL,row,column))
+                return True
+        return False
+
+    def _candidates(self,x,y0,y1):
+        """
+        Returns a list of the (row,column) cells a bolt moving up from (x,y0) to (x,y1) might touch
+
+        The cells are ordered bottom row first, then left to right. For a
+        regular formation they come straight from the grid pitch; otherwise
+        they come from _hash. Either way the length of the list depends only
+        on how far the bolt moved, however large the formation is.
+
+        Parameter x: The x-coordinate of the bolt center, relative to the origin
+        Precondition: x is a number (int or float)
+
+        Parameter y0: The starting y-coordinate of the bolt center, relative to the origin
+        Precondition: y0 is a number (int or float)
+
+        Parameter y1: The final y-coordinate of the bolt center, relative to the origin
+        Precondition: y1 is a number >= y0
+        """
+        reach_x=(BOLT_WIDTH+ALIEN_WIDTH)/2
+        reach_y=(BOLT_HEIGHT+ALIEN_HEIGHT)/2
+        if not self._hash is None:
+            keys=self._hash.query(x-BOLT_WIDTH/2,y0-BOLT_HEIGHT/2,x+BOLT_WIDTH/2,y1+BOLT_HEIGHT/2)
+            cells=[divmod(key,self._columns) for key in keys]
+            cells.sort(key=lambda cell: (-cell[0],cell[1]))
+            return cells
+        c0=max(0,math.ceil((x-reach_x)/ALIEN_PITCH_X))
+        c1=min(self._columns-1,math.floor((x+reach_x)/ALIEN_PITCH_X))
+        #rows grow downwards, so y offsets are negative
+        r0=max(0,math.ceil((-y1-reach_y)/ALIEN_PITCH_Y))
+        r1=min(self._rows-1,math.floor((-y0+reach_y)/ALIEN_PITCH_Y))
+        return [(row,column) for row in range(r1,r0-1,-1) for column in range(c0,c1+1)]
+
+    def _is_regular(self):
+        """
+        Returns True if the formation offsets form a regular grid, False otherwise
+        """
+        columns=np.arange(self._columns)*float(ALIEN_PITCH_X)
+        rows=np.arange(self._rows)*-float(ALIEN_PITCH_Y)
+        return bool(np.all(self._alienx==columns[None,:]) and np.all(self._alieny==rows[:,None]))
+
+    def _pack_state(self):
+        """
+        Returns the scalar state of the wave packed with SNAPSHOT_STATE
+        """
+        won=-1 if self._playerWon is None else int(self._playerWon)
+        return SNAPSHOT_STATE.pack(self._originx,self._originy,_or_nan(self._shipx),
+            self._time,_or_nan(self._deathTime),self._shipFrame,
+            0 if self._movement=="right" else 1,self._fireRate,self._alienSteps,
+            self._shipDestroyed,won,self._lives,self._playerScore,len(self._bolts))
+
+    def _reindex(self):
+        """
+        Rebuilds the counts, bounds and index of the formation from _alive
+        """
+        self._aliveCount=int(self._alive.sum())
+        self._rowCounts=self._alive.sum(axis=1)
+        self._columnCounts=self._alive.sum(axis=0)
+        rows=np.flatnonzero(self._rowCounts)
+        columns=np.flatnonzero(self._columnCounts)
+        self._shooters=columns.tolist()
+        if self._aliveCount>0:
+            self._leftColumn=int(columns[0])
+            self._rightColumn=int(columns[-1])
+            self._lowestRow=int(rows[-1])
+        #the last living row in each column, counting up from the bottom
+        lowest=self._rows-1-np.argmax(self._alive[::-1],axis=0)
+        self._bottomRow=np.where(self._columnCounts>0,lowest,-1)
+        if not self._hash is None:
+            self._hash=SpatialHash(ALIEN_PITCH_X,ALIEN_PITCH_Y)
+            for row,column in zip(*np.nonzero(self._alive)):
+                self._hash.insert(int(row)*self._columns+int(column),self._alienx[row,column],
+                                  self._alieny[row,column],ALIEN_WIDTH,ALIEN_HEIGHT)
+            self._bottomRow=np.array([self._lowest_alive(column) for column in range(self._columns)])
+        if self._aliveCount>0:
+            self._update_edges()
+
+    def _kill(self,row,column):
+        """
+        Kills the alien at row and column, updating the counts and bounds
+
+        Parameter row: The row of the alien
+        Precondition: row is an int in 0.._rows-1
+
+        Parameter column: The column of the alien
+        Precondition: column is an int in 0.._columns-1, and the alien
+        at row and column is alive
+        """
+        assert self._alive[row,column]
+        self._alive[row,column]=False
+        self._aliveCount-=1
+        self._rowCounts[row]-=1
+        self._columnCounts[column]-=1
+        if not self._hash is None:
+            self._hash.remove(row*self._columns+column)
+        if self._columnCounts[column]==0:
+            self._bottomRow[column]=-1
+            self._shooters.remove(column)
+        elif not self._hash is None:
+            self._bottomRow[column]=self._lowest_alive(column)
+        elif self._bottomRow[column]==row:
+            while not self._alive[self._bottomRow[column],column]:
+                self._bottomRow[column]-=1
+        if self._aliveCount==0:
+            return
+        #each bound only moves inwards, so these loops are amortized O(1)
+        while self._columnCounts[self._leftColumn]==0:
+            self._leftColumn+=1
+        while self._columnCounts[self._rightColumn]==0:
+            self._rightColumn-=1
+        while self._rowCounts[self._lowestRow]==0:
+            self._lowestRow-=1
+        self._update_edges()
+
+    def _update_edges(self):
+        """
+        Sets _edgeLeft, _edgeRight and _edgeBottom from the living aliens
+
+        In a regular formation every alien in a column (or row) has the same
+        offset, so the edges come from the outermost living column and row.
+        Otherwise they are worked out from every living alien, which only
+        happens when an alien dies.
+
+        Precondition: at least one alien is alive
+        """
+        if self._hash is None:
+            self._edgeLeft=float(self._columnLeft[self._leftColumn])
+            self._edgeRight=float(self._columnRight[self._rightColumn])
+            self._edgeBottom=float(self._rowBottom[self._lowestRow])
+        else:
+            self._edgeLeft=float(self._alienx[self._alive].min())-ALIEN_WIDTH/2
+            self._edgeRight=float(self._alienx[self._alive].max())+ALIEN_WIDTH/2
+            self._edgeBottom=float(self._alieny[self._alive].min())-ALIEN_HEIGHT/2
+
+    def _lowest_alive(self,column):
+        """
+        Returns the row of the living alien with the lowest y offset in column
+
+        Of aliens at the same height, the one in the later row is chosen. The
+        result is -1 if the column has no living alien.
+
+        Parameter column: The column
+        Precondition: column is an int in 0.._columns-1
+        """
+        best=-1
+        for row in range(self._rows):
+            if self._alive[row,column] and (best==-1 or
+                    self._alieny[row,column]<=self._alieny[best,column]):
+                best=row
+        return best
+
+    def _ship_collides(self,bolt):
+        """
+        Returns True if the alien bolt destroys the ship, False otherwise. Updates _lives
+
+        Parameter bolt: Alien bolt to check for collision with
+        Precondition: bolt is a SimBolt, and must be an alien bolt, and there
+        must be a ship that is not exploding
+        """
+        if _bolt_sweeps(bolt.x,bolt.lasty,bolt.y,self._shipx,SHIP_Y,SHIP_WIDTH,SHIP_HEIGHT):
+            self._deathTime=0.0
+            self._lives-=1
+            self._events.append((EVENT_SHIP_HIT,))
+            return True
+        return False
+
+    def _animate_death(self,dt):
+        """
+        Advances the ship explosion by dt seconds
+
+        When the last frame is reached the ship is removed, along with every
+        bolt on screen, and _shipDestroyed is set.
+
+        Parameter dt: Time since the last update
+        Precondition: dt must be a number (int or float)
+        """
+        self._deathTime+=dt
+        value=(self._deathTime/DEATH_SPEED)*SHIP_FRAMES
+        self._shipFrame=min(int(value),SHIP_FRAMES-1)
+        if self._shipFrame==SHIP_FRAMES-1:
+            self._shipDestroyed=True
+            self._deathTime=None
+            self._shipx=None
+            self._bolts.clear()
+
+    def _checkEnd(self):
+        """
+        Check if the game is over. Updates _playerWon as appropriate
+        """
+        if self._aliveCount==0:
+            self._playerWon=True
+        #check defense line breach
+        elif (self._originy+self._edgeBottom)<=DEFENSE_LINE:
+            self._playerWon=False
+        #check zero lives
+        if self._lives==0:
+            self._playerWon=False
+
+
+def _or_nan(value):
+    """
+    Returns value as a float, or NaN if value is None
+
+    Parameter value: The value to store in a snapshot
+    Precondition: value is a number (int or float) or None
+    """
+    return math.nan if value is None else value
+
+
+def _bolt_sweeps(bx,y0,y1,x,y,width,height):
+    """
+    Returns True if a bolt moving from (bx,y0) to (bx,y1) touches the given rectangle
+
+    The test is between the rectangle and the box the bolt swept out while
+    it moved, so it cannot miss a target however far the bolt moved. For a
+    bolt that did not move this is the same as testing its corners with
+    GObject.contains, as long as the rectangle is larger than the bolt.
+
+    Parameter bx: The x-coordinate of the bolt center
+    Precondition: bx is a number (int or float)
+
+    Parameter y0: The starting y-coordinate of the bolt center
+    Precondition: y0 is a number (int or float)
+
+    Parameter y1: The final y-coordinate of the bolt center
+    Precondition: y1 is a number (int or float)
+
+    Parameter x: The x-coordinate of the rectangle center
+    Precondition: x is a number (int or float)
+
+    Parameter y: The y-coordinate of the rectangle center
+    Precondition: y is a number (int or float)
+
+    Parameter width: The rectangle width
+    Precondition: width is a number > 0
+
+    Parameter height: The rectangle height
+    Precondition: height is a number > 0
+    """
+    if abs(bx-x)>=(BOLT_WIDTH+width)/2:
+        return False
+    bottom=min(y0,y1)-BOLT_HEIGHT/2
+    top=max(y0,y1)+BOLT_HEIGHT/2
+    return bottom<y+height/2 and top>y-height/2
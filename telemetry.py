@@ -0,0 +1,205 @@
+"""
+Telemetry module for Alien Invaders
+
+This module streams what happens in a game to a JSONL file (one JSON object
+per line): the timings of every frame, every change of the game state, and
+the events of the wave (kills, ship hits and bolts fired), and the phase
+timings of each wave when the waves are profiled (see profiler.py).
+
+The game must never wait on the disk. Records are handed to a background
+thread through a bounded queue. If the queue is full, the record is dropped
+and counted rather than blocking the frame; the count is written when the
+stream is closed.
+
+Each record has a 'type' and a time 't' in seconds since the stream opened:
+
+    {"type":"frame","t":..,"dt":..,"update":..,"draw":..,"commands":..}
+    {"type":"state","t":..,"from":"STATE_INACTIVE","to":"STATE_NEWWAVE"}
+    {"type":"kill","t":..,"row":..,"column":..}
+    {"type":"ship_hit","t":..}
+    {"type":"fire","t":..,"player":true}
+    {"type":"profile","t":..,"phases":{"_move_ship":[..],..,"total":[..]}}
+    {"type":"dropped","t":..,"count":..}
+
+Peter Ng'ang'a Wainaina pnw6
+Iman Kiio iwk4
+6th December 2021
+"""
+from consts import *
+import json
+import math
+import queue
+import threading
+import time
+
+# The names of the game states in the records
+STATE_NAMES = {STATE_INACTIVE:'STATE_INACTIVE',STATE_NEWWAVE:'STATE_NEWWAVE',
+    STATE_ACTIVE:'STATE_ACTIVE',STATE_PAUSED:'STATE_PAUSED',
+    STATE_CONTINUE:'STATE_CONTINUE',STATE_COMPLETE:'STATE_COMPLETE',
+    STATE_NEWGAME:'STATE_NEWGAME'}
+# The number of seconds close waits for the writer to finish
+TELEMETRY_CLOSE_WAIT = 2.0
+
+
+class Telemetry(object):
+    """
+    A class to stream game records to a JSONL file from a background thread.
+
+    The methods that add records never block. They may be called from the
+    Kivy Clock callback every frame.
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _queue: the records waiting to be written
+    # Invariant: _queue is a queue.Queue of dictionaries (and, once closed, a
+    # final None telling the writer to stop)
+    #
+    # Attribute _thread: the writer thread
+    # Invariant: _thread is a daemon threading.Thread
+    #
+    # Attribute _file: the file written by _thread
+    # Invariant: _file is a text file open for writing (only used by _thread)
+    #
+    # Attribute _start: the time the stream was opened
+    # Invariant: _start is a float, from time.perf_counter
+    #
+    # Attribute _dropped: the number of records dropped because _queue was full
+    # Invariant: _dropped is an int >= 0
+    #
+    # Attribute _closed: whether close has been called
+    # Invariant: _closed is a bool
+
+    def getDropped(self):
+        """
+        Returns the number of records dropped because the queue was full
+        """
+        return self._dropped
+
+    def __init__(self,path,capacity=TELEMETRY_QUEUE):
+        """
+        Initializes a stream writing to the file path, and starts its thread
+
+        Parameter path: The name of the JSONL file
+        Precondition: path is a string naming a file that can be written
+
+        Parameter capacity: The most records waiting to be written
+        Precondition: capacity is an int > 0
+        """
+        assert isinstance(path,str)
+        assert isinstance(capacity,int) and capacity>0
+        self._queue=queue.Queue(capacity)
+        self._file=open(path,'w')
+        self._start=time.perf_counter()
+        self._dropped=0
+        self._closed=False
+        self._thread=threading.Thread(target=self._write,name='telemetry',daemon=True)
+        self._thread.start()
+
+    def frame(self,dt,update,draw,commands):
+        """
+        Adds a record of the timings of one frame
+
+        Parameter dt: The time in seconds since the last frame
+        Precondition: dt is a number (int or float)
+
+        Parameter update: The time in seconds spent updating the game
+        Precondition: update is a float >= 0
+
+        Parameter draw: The time in seconds spent drawing the game
+        Precondition: draw is a float >= 0
+
+        Parameter commands: The number of graphics commands drawn
+        Precondition: commands is an int >= 0
+        """
+        self._put({'type':'frame','dt':dt,'update':update,'draw':draw,'commands':commands})
+
+    def state(self,old,new):
+        """
+        Adds a record of a change of the game state
+
+        Parameter old: The state before the change
+        Precondition: old is one of the STATE constants
+
+        Parameter new: The state after the change
+        Precondition: new is one of the STATE constants
+        """
+        self._put({'type':'state','from':STATE_NAMES[old],'to':STATE_NAMES[new]})
+
+    def waveEvent(self,event):
+        """
+        Adds a record of a wave event
+
+        Parameter event: The event
+        Precondition: event is an event tuple from Wave.getEvents
+        """
+        if event[0]==EVENT_KILL:
+            self._put({'type':'kill','row':event[1],'column':event[2]})
+        elif event[0]==EVENT_SHIP_HIT:
+            self._put({'type':'ship_hit'})
+        elif event[0]==EVENT_FIRE:
+            self._put({'type':'fire','player':event[1]})
+
+    def profile(self,summary):
+        """
+        Adds a record of the phase timings of the waves played
+
+        The timings of each phase are in ms, at the PROFILE_PERCENTILES of
+        profiler.py. A phase that never ran has null timings.
+
+        Parameter summary: The timings of each phase
+        Precondition: summary is a dictionary from PhaseProfiler.getSummary
+        """
+        phases={name:[None if math.isnan(value) else value for value in values]
+            for name,values in summary.items()}
+        self._put({'type':'profile','phases':phases})
+
+    def close(self):
+        """
+        Writes the number of dropped records, and closes the stream
+
+        This waits (at most TELEMETRY_CLOSE_WAIT seconds) for the records in
+        the queue to be written, so call it when the game stops, not during a
+        frame.
+        """
+        if self._closed:
+            return
+        self._closed=True
+        record={'type':'dropped','t':time.perf_counter()-self._start,'count':self._dropped}
+        try:
+            self._queue.put(record,timeout=TELEMETRY_CLOSE_WAIT)
+            self._queue.put(None,timeout=TELEMETRY_CLOSE_WAIT)
+        except queue.Full:
+            pass
+        self._thread.join(TELEMETRY_CLOSE_WAIT)
+
+    # HELPER METHODS
+    def _put(self,record):
+        """
+        Adds record to the queue, or drops and counts it if the queue is full
+
+        Parameter record: The record, without its time
+        Precondition: record is a dictionary that json can encode
+        """
+        if self._closed:
+            return
+        record['t']=time.perf_counter()-self._start
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self._dropped+=1
+
+    def _write(self):
+        """
+        Writes records from the queue until told to stop (run by _thread)
+
+        The file is flushed whenever the queue runs empty, so the stream is up
+        to date whenever the game is idle.
+        """
+        while True:
+            record=self._queue.get()
+            if record is None:
+                break
+            self._file.write(json.dumps(record))
+            self._file.write('\n')
+            if self._queue.empty():
+                self._file.flush()
+        self._file.close()
@@ -0,0 +1,573 @@
+"""
+Batch simulation module for Alien Invaders
+
+This module contains VecWave, which plays many waves at once. The state of
+every wave is held in NumPy arrays with one entry (or row) per wave, and one
+call to step advances all of them: the ships, the marching formations, alien
+fire, the bolts and the collisions are each one set of array operations over
+the whole batch, not a Python loop over the waves. It is meant for training
+computer players, where thousands of waves per core are needed.
+
+Every wave follows the same rules as WaveSim (see simulation.py), step for
+step. The only difference is where the random numbers come from: a VecWave
+draws from a NumPy generator, so a wave in a batch makes the same kind of
+random choices as a WaveSim (how many steps until the next alien bolt, and
+which column fires it), but not the same ones for the same seed.
+
+All waves in a batch have the same settings, and the formation is always a
+regular grid.
+
+Peter Ng'ang'a Wainaina pnw6
+Iman Kiio iwk4
+6th December 2021
+"""
+from consts import *
+import numpy as np
+
+# The key bits of an action (the same bits as LOG_KEYS in replay.py)
+VEC_LEFT = 0x01
+VEC_RIGHT = 0x02
+VEC_FIRE = 0x04
+
+
+class VecWave(object):
+    """
+    A class to play a batch of waves in lockstep.
+
+    Each call to step takes one action per wave, as a bit mask of VEC_LEFT,
+    VEC_RIGHT and VEC_FIRE. Waves are numbered 0..getSize()-1.
+
+    As with WaveSim, a destroyed ship stays destroyed until createNewShips is
+    called, and a finished wave stays finished until it is reset. Stepping a
+    finished wave is allowed, just as updating a finished WaveSim is.
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _size: the number of waves
+    # Invariant: _size is an int > 0
+    #
+    # Attribute _rows, _columns, _alienSpeed, _boltRate, _boltSpeed, _startLives:
+    # the settings of every wave (see WaveSim)
+    #
+    # Attribute _rng: the source of every random choice in the batch
+    # Invariant: _rng is a numpy.random.Generator
+    #
+    # Attribute _hasShip: which waves have a ship
+    # Invariant: _hasShip is a numpy array of _size bools
+    #
+    # Attribute _shipx: the x-coordinate of each ship center
+    # Invariant: _shipx is a numpy array of _size floats (meaningless where
+    # there is no ship)
+    #
+    # Attribute _shipFrame: the frame of each ship explosion
+    # Invariant: _shipFrame is a numpy array of _size ints in 0..SHIP_FRAMES-1
+    #
+    # Attribute _dying: which ships are exploding
+    # Invariant: _dying is a numpy array of _size bools
+    #
+    # Attribute _deathTime: the time spent on each ship explosion
+    # Invariant: _deathTime is a numpy array of _size floats >= 0
+    # (meaningless where the ship is not exploding)
+    #
+    # Attribute _shipDestroyed: which ships have finished exploding
+    # Invariant: _shipDestroyed is a numpy array of _size bools
+    #
+    # Attribute _originx, _originy: the formation origin of each wave
+    # Invariant: each is a numpy array of _size floats
+    #
+    # Attribute _right: which formations are marching right
+    # Invariant: _right is a numpy array of _size bools
+    #
+    # Attribute _time: the time since the last alien step of each wave
+    # Invariant: _time is a numpy array of _size floats >= 0
+    #
+    # Attribute _fireRate: the number of steps before each next alien bolt
+    # Invariant: _fireRate is a numpy array of _size ints in 1.._boltRate
+    #
+    # Attribute _alienSteps: the steps since each last alien bolt
+    # Invariant: _alienSteps is a numpy array of _size ints >= 0
+    #
+    # Attribute _alive: which aliens are alive in each wave
+    # Invariant: _alive is a _size x _rows x _columns numpy array of bools
+    #
+    # Attribute _rowCounts: the number of living aliens in each row
+    # Invariant: _rowCounts is a _size x _rows numpy array of ints
+    #
+    # Attribute _columnCounts: the number of living aliens in each column
+    # Invariant: _columnCounts is a _size x _columns numpy array of ints
+    #
+    # Attribute _aliveCount: the number of living aliens in each wave
+    # Invariant: _aliveCount is a numpy array of _size ints
+    #
+    # Attribute _player, _playerx, _playery, _playerLast: the player bolt of
+    # each wave (at most one), as whether it exists, its center and the y it
+    # started the last move at
+    # Invariant: _player is a numpy array of _size bools, the others numpy
+    # arrays of _size floats (meaningless where there is no bolt)
+    #
+    # Attribute _alien, _alienx, _alieny, _alienLast: the alien bolts of each
+    # wave, in the same form
+    # Invariant: _alien is a _size x _capacity numpy array of bools, the others
+    # _size x _capacity numpy arrays of floats
+    #
+    # Attribute _capacity: the most alien bolts a wave can have at once
+    # Invariant: _capacity is an int > 0, more than a bolt can ever need
+    #
+    # Attribute _lives: the lives left in each wave
+    # Invariant: _lives is a numpy array of _size ints >= 0
+    #
+    # Attribute _kills: the number of aliens killed in each wave
+    # Invariant: _kills is a numpy array of _size ints >= 0
+    #
+    # Attribute _won: the result of each wave, 1 if won, 0 if lost, -1 if not over
+    # Invariant: _won is a numpy array of _size ints
+    #
+    # Attribute _offsetx: the x offset of each column from the origin
+    # Invariant: _offsetx is a numpy array of _columns floats
+    #
+    # Attribute _offsety: the y offset of each row from the origin
+    # Invariant: _offsety is a numpy array of _rows floats
+    #
+    # Attribute _waves: the number of each wave, for indexing
+    # Invariant: _waves is the numpy array 0.._size-1
+
+    # GETTERS AND SETTERS
+    def getSize(self):
+        """
+        Returns the number of waves
+        """
+        return self._size
+
+    def getRows(self):
+        """
+        Returns the number of rows of aliens
+        """
+        return self._rows
+
+    def getColumns(self):
+        """
+        Returns the number of aliens per row
+        """
+        return self._columns
+
+    def getShipX(self):
+        """
+        Returns the x-coordinate of each ship center, NaN where there is no ship
+        """
+        return np.where(self._hasShip,self._shipx,np.nan)
+
+    def getShipFrame(self):
+        """
+        Returns the frame of each ship explosion
+
+        The array is owned by the batch and must not be modified.
+        """
+        return self._shipFrame
+
+    def getFormationOrigin(self):
+        """
+        Returns the formation origins, as a pair of arrays (x,y)
+
+        The arrays are owned by the batch and must not be modified.
+        """
+        return (self._originx,self._originy)
+
+    def getAlive(self):
+        """
+        Returns the getSize() x getRows() x getColumns() mask of living aliens
+
+        The array is owned by the batch and must not be modified.
+        """
+        return self._alive
+
+    def getAliveCount(self):
+        """
+        Returns the number of living aliens in each wave
+
+        The array is owned by the batch and must not be modified.
+        """
+        return self._aliveCount
+
+    def getPlayerBolts(self):
+        """
+        Returns the player bolts, as arrays (exists,x,y), one entry per wave
+
+        The arrays are owned by the batch and must not be modified.
+        """
+        return (self._player,self._playerx,self._playery)
+
+    def getAlienBolts(self):
+        """
+        Returns the alien bolts, as arrays (exists,x,y), one row per wave
+
+        The arrays are owned by the batch and must not be modified.
+        """
+        return (self._alien,self._alienx,self._alieny)
+
+    def getLives(self):
+        """
+        Returns the lives left in each wave
+
+        The array is owned by the batch and must not be modified.
+        """
+        return self._lives
+
+    def getScores(self):
+        """
+        Returns the score of each wave
+        """
+        return self._kills*10
+
+    def getResults(self):
+        """
+        Returns the result of each wave: 1 if won, 0 if lost, -1 if not over
+
+        The array is owned by the batch and must not be modified.
+        """
+        return self._won
+
+    def isShipDestroyed(self):
+        """
+        Returns which ships have been destroyed and not yet replaced
+
+        The array is owned by the batch and must not be modified.
+        """
+        return self._shipDestroyed
+
+    def isLifeLeft(self):
+        """
+        Returns which waves have a life left
+        """
+        return self._lives>0
+
+    # INITIALIZER
+    def __init__(self,size,seed=None,rows=ALIEN_ROWS,columns=ALIENS_IN_ROW,
+                 alienSpeed=ALIEN_SPEED,boltRate=BOLT_RATE,boltSpeed=BOLT_SPEED,lives=SHIP_LIVES):
+        """
+        Initializes a batch of size new waves
+
+        The settings default to the constants in consts.py, as for WaveSim.
+
+        Parameter size: The number of waves
+        Precondition: size is an int > 0
+
+        Parameter seed: The seed of the random number generator of the batch
+        Precondition: seed is an int >= 0, or None for a seed from the
+        operating system
+
+        The other parameters are as for WaveSim.
+        """
+        assert isinstance(size,int) and size>0
+        assert isinstance(rows,int) and rows>0
+        assert isinstance(columns,int) and columns>0
+        assert (isinstance(alienSpeed,int) or isinstance(alienSpeed,float)) and alienSpeed>0
+        assert isinstance(boltRate,int) and boltRate>0
+        assert (isinstance(boltSpeed,int) or isinstance(boltSpeed,float)) and boltSpeed>0
+        assert isinstance(lives,int) and lives>0
+        self._size=size
+        self._rows=rows
+        self._columns=columns
+        self._alienSpeed=float(alienSpeed)
+        self._boltRate=boltRate
+        self._boltSpeed=boltSpeed
+        self._startLives=lives
+        self._rng=np.random.default_rng(seed)
+        #aliens fire at most once per step, and a bolt is gone once it has
+        #fallen the height of the screen
+        self._capacity=int((GAME_HEIGHT+BOLT_HEIGHT)//(boltSpeed+BOLT_HEIGHT/2))+2
+
+        self._hasShip=np.zeros(size,dtype=bool)
+        self._shipx=np.zeros(size)
+        self._shipFrame=np.zeros(size,dtype=int)
+        self._dying=np.zeros(size,dtype=bool)
+        self._deathTime=np.zeros(size)
+        self._shipDestroyed=np.zeros(size,dtype=bool)
+        self._originx=np.zeros(size)
+        self._originy=np.zeros(size)
+        self._right=np.zeros(size,dtype=bool)
+        self._time=np.zeros(size)
+        self._fireRate=np.ones(size,dtype=int)
+        self._alienSteps=np.zeros(size,dtype=int)
+        self._alive=np.zeros((size,rows,columns),dtype=bool)
+        self._rowCounts=np.zeros((size,rows),dtype=int)
+        self._columnCounts=np.zeros((size,columns),dtype=int)
+        self._aliveCount=np.zeros(size,dtype=int)
+        self._player=np.zeros(size,dtype=bool)
+        self._playerx=np.zeros(size)
+        self._playery=np.zeros(size)
+        self._playerLast=np.zeros(size)
+        self._alien=np.zeros((size,self._capacity),dtype=bool)
+        self._alienx=np.zeros((size,self._capacity))
+        self._alieny=np.zeros((size,self._capacity))
+        self._alienLast=np.zeros((size,self._capacity))
+        self._lives=np.zeros(size,dtype=int)
+        self._kills=np.zeros(size,dtype=int)
+        self._won=np.zeros(size,dtype=int)
+
+        #the formation is a regular grid, so its offsets are the same everywhere
+        self._offsetx=np.arange(columns)*float(ALIEN_PITCH_X)
+        self._offsety=np.arange(rows)*-float(ALIEN_PITCH_Y)
+        self._waves=np.arange(size)
+        self.reset(np.ones(size,dtype=bool))
+
+    def reset(self,mask):
+        """
+        Starts a new wave in place of every wave in mask
+
+        Parameter mask: The waves to reset
+        Precondition: mask is a numpy array of getSize() bools
+        """
+        count=int(mask.sum())
+        if count==0:
+            return
+        self._hasShip[mask]=True
+        self._shipx[mask]=GAME_WIDTH/2
+        self._shipFrame[mask]=0
+        self._dying[mask]=False
+        self._deathTime[mask]=0.0
+        self._shipDestroyed[mask]=False
+        self._originx[mask]=ALIEN_H_SEP+(ALIEN_WIDTH/2)
+        self._originy[mask]=float(GAME_HEIGHT-ALIEN_CEILING)
+        self._right[mask]=True
+        self._time[mask]=0.0
+        self._fireRate[mask]=self._draw_rates(count)
+        self._alienSteps[mask]=0
+        self._alive[mask]=True
+        self._rowCounts[mask]=self._columns
+        self._columnCounts[mask]=self._rows
+        self._aliveCount[mask]=self._rows*self._columns
+        self._player[mask]=False
+        self._alien[mask]=False
+        self._lives[mask]=self._startLives
+        self._kills[mask]=0
+        self._won[mask]=-1
+
+    def createNewShips(self,mask):
+        """
+        Brings on a new ship in every wave in mask whose ship was destroyed
+
+        This does for each wave what createNewShip and resetShipDestroyed do
+        for a WaveSim.
+
+        Parameter mask: The waves to bring a ship on in
+        Precondition: mask is a numpy array of getSize() bools
+        """
+        mask=mask & self._shipDestroyed
+        self._hasShip[mask]=True
+        self._shipx[mask]=GAME_WIDTH/2
+        self._shipFrame[mask]=0
+        self._shipDestroyed[mask]=False
+
+    # UPDATE METHOD
+    def step(self,actions,dt=1/60):
+        """
+        Simulates a single frame in every wave
+
+        Parameter actions: The keys held down in each wave
+        Precondition: actions is a numpy array of getSize() ints, each a bit
+        mask of VEC_LEFT, VEC_RIGHT and VEC_FIRE
+
+        Parameter dt: The time in seconds since last update (the same for
+        every wave)
+        Precondition: dt is a number (int or float)
+        """
+        assert len(actions)==self._size
+        dying=self._dying.copy()
+        self._animate_death(dying,dt)
+        control=self._hasShip & ~dying
+        self._move_ship(control,actions)
+        self._fire(control,actions)
+        self._move_aliens(self._aliveCount>0,dt)
+        self._move_bolts()
+        self._collides()
+        self._checkEnd()
+
+    # HELPER METHODS
+    def _draw_rates(self,count):
+        """
+        Returns count new alien fire rates, each in 1.._boltRate
+
+        Parameter count: The number of rates
+        Precondition: count is an int >= 0
+        """
+        return self._rng.integers(1,self._boltRate+1,size=count)
+
+    def _draw_shooters(self,counts):
+        """
+        Returns a random index below each of counts, for choosing a column
+
+        Parameter counts: The number of columns to choose from in each wave
+        Precondition: counts is a numpy array of ints > 0
+        """
+        return (self._rng.random(len(counts))*counts).astype(int)
+
+    def _animate_death(self,mask,dt):
+        """
+        Advances the ship explosions in mask by dt seconds
+
+        When the last frame is reached the ship is removed, along with every
+        bolt on screen, and the ship is marked destroyed.
+
+        Parameter mask: The waves whose ship is exploding
+        Precondition: mask is a numpy array of getSize() bools
+
+        Parameter dt: Time since the last update
+        Precondition: dt must be a number (int or float)
+        """
+        if not mask.any():
+            return
+        self._deathTime[mask]+=dt
+        frames=np.minimum((self._deathTime/DEATH_SPEED*SHIP_FRAMES).astype(int),SHIP_FRAMES-1)
+        self._shipFrame[mask]=frames[mask]
+        done=mask & (self._shipFrame==SHIP_FRAMES-1)
+        self._shipDestroyed[done]=True
+        self._dying[done]=False
+        self._hasShip[done]=False
+        self._player[done]=False
+        self._alien[done]=False
+
+    def _move_ship(self,mask,actions):
+        """
+        Moves the ships in mask left or right as their actions ask
+
+        Parameter mask: The waves whose ship can move
+        Precondition: mask is a numpy array of getSize() bools
+
+        Parameter actions: The keys held down in each wave
+        Precondition: actions is a numpy array of getSize() ints
+        """
+        x=self._shipx
+        high=x>(GAME_WIDTH-(0.5*SHIP_WIDTH))
+        low=~high & (x<0.5*SHIP_WIDTH)
+        moved=x+np.where(actions & VEC_RIGHT,SHIP_MOVEMENT,0)
+        moved=moved-np.where(actions & VEC_LEFT,SHIP_MOVEMENT,0)
+        moved=np.where(high,0.5*SHIP_WIDTH,np.where(low,GAME_WIDTH-(0.5*SHIP_WIDTH),moved))
+        self._shipx=np.where(mask,moved,x)
+
+    def _fire(self,mask,actions):
+        """
+        Fires a player bolt in each wave in mask that asks to and has none on screen
+
+        Parameter mask: The waves whose ship can fire
+        Precondition: mask is a numpy array of getSize() bools
+
+        Parameter actions: The keys held down in each wave
+        Precondition: actions is a numpy array of getSize() ints
+        """
+        fire=mask & ((actions & VEC_FIRE)!=0) & ~self._player
+        self._player[fire]=True
+        self._playerx[fire]=self._shipx[fire]
+        self._playery[fire]=SHIP_Y+SHIP_HEIGHT/2+BOLT_HEIGHT/2
+
+    def _move_aliens(self,mask,dt):
+        """
+        Moves the formations in mask, firing an alien bolt every _fireRate steps
+
+        Parameter mask: The waves with a living alien
+        Precondition: mask is a numpy array of getSize() bools
+
+        Parameter dt: Time since the last update
+        Precondition: dt must be a number (int or float)
+        """
+        fire=mask & (self._alienSteps==self._fireRate)
+        if fire.any():
+            waves=self._waves[fire]
+            self._alienSteps[fire]=0
+            self._fireRate[fire]=self._draw_rates(len(waves))
+            #choose a column with a living alien, each equally likely
+            shooters=self._columnCounts[waves]>0
+            pick=self._draw_shooters(shooters.sum(axis=1))
+            column=np.argmax(np.cumsum(shooters,axis=1)>pick[:,None],axis=1)
+            #the bottom living alien in that column
+            living=self._alive[waves,:,column]
+            row=self._rows-1-np.argmax(living[:,::-1],axis=1)
+            slot=np.argmin(self._alien[waves],axis=1)
+            self._alien[waves,slot]=True
+            self._alienx[waves,slot]=self._originx[waves]+self._offsetx[column]
+            self._alieny[waves,slot]=self._originy[waves]+self._offsety[row]-(ALIEN_HEIGHT/2+BOLT_HEIGHT/2)
+
+        self._time[mask]+=dt
+        step=mask & (self._time>self._alienSpeed)
+        self._alienSteps[step]+=1
+        self._time[step]-=self._alienSpeed
+        self._originx[step]+=np.where(self._right[step],ALIEN_H_WALK,-ALIEN_H_WALK)
+
+        #determine whether to move down
+        columns=self._columnCounts>0
+        left=np.argmax(columns,axis=1)
+        right=self._columns-1-np.argmax(columns[:,::-1],axis=1)
+        edgeRight=self._originx+(self._offsetx[right]+ALIEN_WIDTH/2)
+        edgeLeft=self._originx+(self._offsetx[left]-ALIEN_WIDTH/2)
+        turn=mask & np.where(self._right,(GAME_WIDTH-edgeRight)<ALIEN_H_SEP,ALIEN_H_SEP>edgeLeft)
+        self._right[turn]=~self._right[turn]
+        self._originy[turn]-=ALIEN_V_WALK
+
+    def _move_bolts(self):
+        """
+        Moves all existing bolts, remembering where each one started
+        """
+        self._playerLast[:]=self._playery
+        self._playery+=np.where(self._player,self._boltSpeed+BOLT_HEIGHT/2,0)
+        self._alienLast[:]=self._alieny
+        self._alieny+=np.where(self._alien,-self._boltSpeed-BOLT_HEIGHT/2,0)
+
+    def _collides(self):
+        """
+        Checks every bolt for a collision, removing bolts that hit something
+
+        As in WaveSim, each bolt is tested over the whole path it covered in
+        the last move, a player bolt kills the first living alien on its path
+        (the bottom one), only one alien bolt can destroy a ship, and a ship
+        that is already exploding cannot be hit again. Bolts that missed and
+        have left the screen are removed as well.
+        """
+        #player bolts, in formation space
+        shot=self._player & (self._aliveCount>0)
+        x=self._playerx-self._originx
+        y0=self._playerLast-self._originy
+        y1=self._playery-self._originy
+        #a bolt is narrower than the gap between columns, so it can only be in one
+        column=np.clip(np.rint(x/ALIEN_PITCH_X).astype(int),0,self._columns-1)
+        shot&=np.abs(x-self._offsetx[column])<(BOLT_WIDTH+ALIEN_WIDTH)/2
+        bottom=np.minimum(y0,y1)-BOLT_HEIGHT/2
+        top=np.maximum(y0,y1)+BOLT_HEIGHT/2
+        rows=(bottom[:,None]<self._offsety[None,:]+ALIEN_HEIGHT/2) & \
+            (top[:,None]>self._offsety[None,:]-ALIEN_HEIGHT/2) & \
+            self._alive[self._waves,:,column]
+        shot&=rows.any(axis=1)
+        if shot.any():
+            waves=self._waves[shot]
+            row=self._rows-1-np.argmax(rows[shot][:,::-1],axis=1)
+            column=column[shot]
+            self._alive[waves,row,column]=False
+            self._rowCounts[waves,row]-=1
+            self._columnCounts[waves,column]-=1
+            self._aliveCount[waves]-=1
+            self._kills[waves]+=1
+        gone=(self._playery-BOLT_HEIGHT/2)>GAME_HEIGHT
+        self._player&=~(shot | gone)
+
+        #alien bolts against the ships that can be hit
+        target=self._hasShip & ~self._dying
+        bottom=np.minimum(self._alienLast,self._alieny)-BOLT_HEIGHT/2
+        top=np.maximum(self._alienLast,self._alieny)+BOLT_HEIGHT/2
+        hits=self._alien & target[:,None] & \
+            (np.abs(self._alienx-self._shipx[:,None])<(BOLT_WIDTH+SHIP_WIDTH)/2) & \
+            (bottom<SHIP_Y+SHIP_HEIGHT/2) & (top>SHIP_Y-SHIP_HEIGHT/2)
+        hit=hits.any(axis=1)
+        if hit.any():
+            waves=self._waves[hit]
+            self._alien[waves,np.argmax(hits[hit],axis=1)]=False
+            self._dying[hit]=True
+            self._deathTime[hit]=0.0
+            self._lives[hit]-=1
+        self._alien&=~((self._alieny+BOLT_HEIGHT/2)<0)
+
+    def _checkEnd(self):
+        """
+        Checks which waves are over, and records their results
+        """
+        rows=self._rowCounts>0
+        lowest=self._rows-1-np.argmax(rows[:,::-1],axis=1)
+        breach=(self._originy+(self._offsety[lowest]-ALIEN_HEIGHT/2))<=DEFENSE_LINE
+        self._won=np.where(self._aliveCount==0,1,np.where(breach,0,self._won))
+        self._won[self._lives==0]=0
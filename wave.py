@@ -20,7 +20,7 @@ Iman Kiio iwk4
 from game2d import *
 from consts import *
 from models import *
-import random
+from simulation import *
 
 # PRIMARY RULE: Wave can only access attributes in models.py via getters/setters
 # Wave is NOT allowed to access anything in app.py (Subcontrollers are not
@@ -32,11 +32,13 @@ class Wave(object):
     This class controls a single level or wave of Alien Invaders.
 
     This subcontroller has a reference to the ship, aliens, and any laser bolts
-    on screen. It animates the laser bolts, removing any aliens as necessary.
-    It also marches the aliens back and forth across the screen until they are
-    all destroyed or they reach the defense line (at which point the player
-    loses). When the wave is complete, you  should create a NEW instance of
-    Wave (in Invaders) if you want to make a new wave of aliens.
+    on screen. The game itself is played by a headless WaveSim (see
+    simulation.py), which marches the aliens back and forth across the screen
+    until they are all destroyed or they reach the defense line (at which point
+    the player loses). This class passes the input on to the simulation and
+    moves its sprites to match. When the wave is complete, you  should create
+    a NEW instance of Wave (in Invaders) if you want to make a new wave of
+    aliens.
 
     If you want to pause the game, tell this controller to draw, but do not
     update.  See subcontrollers.py from Lecture 24 for an example.  This
@@ -52,122 +54,176 @@ class Wave(object):
 
     """
     # HIDDEN ATTRIBUTES:
-    # Attribute _ship: the player ship to control
-    # Invariant: _ship is a Ship object or None
+    # Attribute _sim: the headless simulation of this wave
+    # Invariant: _sim is a WaveSim object
+    #
+    # Attribute _ship: the player ship to draw
+    # Invariant: _ship is a Ship object or None, and is None exactly when
+    # _sim has no ship
     #
     # Attribute _aliens: the 2d list of aliens in the wave
-    # Invariant: _aliens is a rectangular 2d list containing Alien objects or None
+    # Invariant: _aliens is a rectangular 2d list of Alien objects, one for
+    # every alien in _sim, living or dead. Each Alien is positioned relative
+    # to the formation origin.
+    #
+    # Attribute _formation: the scene that draws the living aliens
+    # Invariant: _formation is a GScene whose children are the Alien objects
+    # in _aliens that are alive in _sim, and whose position is the formation
+    # origin in _sim
     #
     # Attribute _bolts: the laser bolts currently on screen
-    # Invariant: _bolts is a list of Bolt objects, possibly empty
+    # Invariant: _bolts is a dictionary mapping each SimBolt in _sim to the
+    # Bolt object that draws it
+    #
+    # Attribute _pool: the spare bolts to draw new shots with
+    # Invariant: _pool is a BoltPool object
     #
     # Attribute _dline: the defensive line being protected
     # Invariant : _dline is a GPath object
     #
-    # Attribute _lives: the number of lives left
-    # Invariant: _lives is an int >= 0
-    #
-    # Attribute _time: the amount of time since the last Alien "step"
-    # Invariant: _time is a float >= 0s
-    #
-    # You may change any attribute above, as long as you update the invariant
-    # You may also add any new attributes as long as you document them.
-    # LIST MORE ATTRIBUTES (AND THEIR INVARIANTS) HERE IF NECESSARY
-
-    #Attribute _movement: horizontal alien motion
-    #Invariant: _movement is a string, either "right" or "left"
-    #
-    #Attribute _fireRate: number of steps to take before next alien bolt
-    #Invariant :_fireRate is an int in  1..BOLT_RATE
-    #
-    #Attribute _alienSteps : number of steps by aliens since last bolt was fired
-    #Invariant :_alienSteps is an int greater >=0
-    #
-    # Attribute _animator: A coroutine for performing an animation
-    # Invariant: _animator is a generator-based coroutine (or None)
-    #
-    #Attribute _shipDestroyed: whether existing ship is destroyed
-    #Invariant: _shipDestroyed is a boolean
-    #
-    #Attribute _playerWon: whether the player has won
-    #Invariant: _playerWon is either a boolean indicating endgame or None as game progresses
-    #
-    #Attribute _playerScore: current player score
-    #Invariant :_playerScore is and int>=0
+    # The rules of the game (lives, score, alien steps, ...) are all kept in
+    # _sim. This class only keeps the sprites in step with the simulation.
 
     # GETTERS AND SETTERS (ONLY ADD IF YOU NEED THEM)
     def isShipDestroyed(self):
         """
         Returns True if the ship is destroyed, False otherwise
         """
-        return self._shipDestroyed
+        return self._sim.isShipDestroyed()
 
     def resetShipDestroyed(self):
         """
         Sets _shipDestroyed to False
         """
-        self._shipDestroyed=False
+        self._sim.resetShipDestroyed()
 
     def isLifeLeft(self):
         """
         Returns  True is _lives is greater than 0 False otherwise
         """
-        return self._lives>0
+        return self._sim.isLifeLeft()
 
     def getLives(self):
         """
         Returns the number of player lives left
         """
-        return self._lives
+        return self._sim.getLives()
 
     def createNewShip(self):
         """
         Creates a new Ship object at the original position
         """
+        self._sim.createNewShip()
         self._ship=Ship()
 
     def hasPlayerWon(self):
         """
         Return True if player has won, False if player has lost, or None if game is not over yet
         """
-        return self._playerWon
+        return self._sim.hasPlayerWon()
 
     def getScore(self):
         """
         Return the current player Score
         """
-        return (self._playerScore*10)
+        return self._sim.getScore()
 
-    # INITIALIZER (standard form) TO CREATE SHIP AND ALIENS
-    #helper for drawing aliens
+    def getRandomState(self):
+        """
+        Returns the state of the random number generator of this wave
+        """
+        return self._sim.getRandomState()
+
+    def setRandomState(self,state):
+        """
+        Restores the random number generator to a state from getRandomState
 
-    def __init__(self):
+        Parameter state: The generator state
+        Precondition: state was returned by getRandomState
+        """
+        self._sim.setRandomState(state)
+
+    def getEvents(self):
+        """
+        Returns the list of events from the last call to update, in order
+
+        See WaveSim.getEvents for the kinds of event. The list must not be
+        modified.
+        """
+        return self._sim.getEvents()
+
+    def getProfiler(self):
+        """
+        Returns the profiler timing the phases of update, or None if it is off
+        """
+        return self._sim.getProfiler()
+
+    def setProfiler(self,profiler):
+        """
+        Sets the profiler timing the phases of update
+
+        Parameter profiler: The profiler to record into
+        Precondition: profiler is a PhaseProfiler, or None to turn profiling off
+        """
+        self._sim.setProfiler(profiler)
+
+    # INITIALIZER (standard form) TO CREATE SHIP AND ALIENS
+    def __init__(self,rng=None,sim=None):
         """
         Initializes a new Wave object
+
+        Parameter rng: The random number generator for this wave
+        Precondition: rng is a random.Random object, or None for a new
+        generator seeded by the operating system
+
+        Parameter sim: The simulation to draw, instead of a new one
+        Precondition: sim is a new WaveSim object (and rng is None), or None
         """
+        assert sim is None or (isinstance(sim,WaveSim) and rng is None)
+        self._sim=WaveSim(rng) if sim is None else sim
         self._aliens=self.create_aliens()
+        origin=self._sim.getFormationOrigin()
+        self._formation=GScene(x=origin[0],y=origin[1],children=self._living_aliens())
         self._ship=Ship()
         self._dline=GPath(linewidth=2,points=[0,DEFENSE_LINE,800,DEFENSE_LINE],linecolor="black")
-        #no animation, hence time zero
-        self._time=0
-        #aliens start at right edge hence moving right
-        self._movement="right"
         #at start, no bolts
-        self._bolts=[]
-        # at the start, randomize firing chance
-        self._fireRate=random.randint(1,BOLT_RATE)
-        #no steps so far
-        self._alienSteps=0
-        #animator isn't running
-        self._animator=None
-        #ship not destroyed yet
-        self._shipDestroyed=False
-        #lives full at the start
-        self._lives=SHIP_LIVES
-        #player hasn't won yet
-        self._playerWon=None
-        #no score yet
-        self._playerScore=0
+        self._bolts={}
+        self._pool=BoltPool()
+
+    def snapshot(self):
+        """
+        Returns the complete state of the wave as compact bytes
+
+        See WaveSim.snapshot for what the bytes hold.
+        """
+        return self._sim.snapshot()
+
+    def restore(self,data):
+        """
+        Restores the wave to the state in data, and moves the sprites to match
+
+        The alien sprites are kept for the whole wave, so restoring (even to a
+        state where dead aliens are alive again) creates no new aliens.
+
+        Parameter data: The wave state
+        Precondition: data is a bytes object returned by snapshot, from a
+        wave with the same settings as this one
+        """
+        self._sim.restore(data)
+        if self._sim.getShipX() is None:
+            self._ship=None
+        elif self._ship is None:
+            self._ship=Ship()
+        self._sync_ship()
+        origin=self._sim.getFormationOrigin()
+        self._formation.x=origin[0]
+        self._formation.y=origin[1]
+        self._formation.children=self._living_aliens()
+        #the restored bolts are new objects, so every sprite is spent
+        for bolt in self._bolts.values():
+            self._pool.release(bolt)
+        self._bolts={}
+        self._sync_bolts()
 
     # UPDATE METHOD TO MOVE THE SHIP, ALIENS, AND LASER BOLTS
     def update(self,input,dt):
@@ -175,36 +231,18 @@ class Wave(object):
         Animates a single frame in the wave
 
         Parameter input: The input from the User
-        Precondition: input must be an instance of GInput
+        Precondition: input has a method is_key_down (e.g. GInput or SimInput)
 
         Parameter dt: The time in seconds since last update
         Precondition: dt is a number (int or float)
         """
-        assert isinstance(input,GInput)
+        assert hasattr(input,'is_key_down')
         assert isinstance(dt,int) or isinstance(dt,float)
 
-        if not self._animator is None:
-            try:
-                self._animator.send(dt)
-            except StopIteration:
-                self._shipDestroyed=True
-                self._animator=None
-                self._ship=None
-                self._bolts.clear()
-        else:
-            #move ship
-            if not self._ship is None:
-                self._move_ship(input)
-                self._fire(input)
-        #move aliens and maybe fire
-        if self._aliens_exist():
-            self._move_aliens(dt)
-        #move bolts
-        self._move_bolt()
-        #check for colision
-        self._collides()
-        #check game ending
-        self._checkEnd()
+        self._sim.update(input,dt)
+        self._sync_ship()
+        self._sync_formation()
+        self._sync_bolts()
 
     # DRAW METHOD TO DRAW THE SHIP, ALIENS, DEFENSIVE LINE AND BOLTS
     def draw(self,view):
@@ -221,324 +259,90 @@ class Wave(object):
         #draw defensive line
         self._dline.draw(view)
         #draw aliens
-        for row in range (len(self._aliens)):
-            for alien in self._aliens[row]:
-                if not alien is None:
-                    alien.draw(view)
+        self._formation.draw(view)
         #draw bolts
-        for bolt in self._bolts:
+        for bolt in self._bolts.values():
             bolt.draw(view)
 
-    # HELPER METHODS FOR COLLISION DETECTION
-    #helper for drawing aliens
+    # HELPER METHODS TO KEEP THE SPRITES IN STEP WITH THE SIMULATION
     def create_aliens(self):
         """
         Returns a 2-D list of Alien Objects
         Helper function to initialize _aliens
+
+        Each alien is positioned relative to the formation origin, not the
+        game window.
         """
         #accumulator for all aliens
         aliens=[]
-        y=GAME_HEIGHT-ALIEN_CEILING
-        for row in range (ALIEN_ROWS):
-            #find image to use based on row
-            if row%2==0:
-                image=((row+1)//2)%len(ALIEN_IMAGES)
-            else:
-                image=((row)//2)%len(ALIEN_IMAGES)
+        for row in range (self._sim.getRows()):
             #accumulator for aliens on one column
             alien_columns=[]
-            #position of first Alien
-            x=ALIEN_H_SEP+(ALIEN_WIDTH/2)
-
-            for column in range(ALIENS_IN_ROW):
-                alien_columns.append(Alien(x,y,image))
-                #calculate x position of next Alien
-                x+=(ALIEN_H_SEP+ALIEN_WIDTH)
-            #calculate y coordinate of next row
-            y-=(ALIEN_HEIGHT+ALIEN_V_SEP)
+            for column in range(self._sim.getColumns()):
+                pos=self._sim.getAlien(row,column)
+                image=self._sim.getAlienImage(row,column)
+                alien_columns.append(Alien(pos[0],pos[1],image))
             aliens.append(alien_columns)
 
         return aliens
 
-    def _move_ship(self,input):
+    def _sync_ship(self):
         """
-        Moves the ship left or right as specified by player via input
-
-        Parameter input:User Input
-        Precondition: input must be an instance of GInput
+        Moves the ship sprite to the simulated ship, or removes it
         """
-        #asserts
-        assert isinstance(input,GInput)
-        #ship wraps around screen
-        if self._ship.x>(GAME_WIDTH-(0.5*SHIP_WIDTH)):
-            self._ship.x=0.5*SHIP_WIDTH
-        elif self._ship.x<0.5*SHIP_WIDTH:
-            self._ship.x=GAME_WIDTH-(0.5*SHIP_WIDTH)
-        else:
-            if input.is_key_down("right"):
-                self._ship.x+=SHIP_MOVEMENT
-            if input.is_key_down("left"):
-                self._ship.x-=SHIP_MOVEMENT
+        x=self._sim.getShipX()
+        if x is None:
+            self._ship=None
+        elif not self._ship is None:
+            self._ship.x=x
+            if self._ship.getFrame()!=self._sim.getShipFrame():
+                self._ship.setFrame(self._sim.getShipFrame())
 
-    def _move_aliens(self,dt):
+    def _living_aliens(self):
         """
-        Moves the aliens
-
-        Parameter dt: Time since the last update
-        Precondition:dt must be a number(int or float)
+        Returns a list of the Alien objects in _aliens that are still alive
         """
-        assert isinstance(dt,int) or isinstance(dt,float)
+        alive=self._sim.getAlive()
+        living=[]
+        for row in range(len(self._aliens)):
+            for column in range(len(self._aliens[row])):
+                if alive[row,column]:
+                    living.append(self._aliens[row][column])
+        return living
 
-        if self._alienSteps==self._fireRate:
-            #reset steps
-            self._alienSteps=0
-            #randomize and reset fire rate
-            self._fireRate=random.randint(1,BOLT_RATE)
-            #get x and y co-coordinate
-            bolt_pos=self._alien_to_fire()
-            self._bolts.append(Bolt(bolt_pos[0],(bolt_pos[1]-(ALIEN_HEIGHT/2+BOLT_HEIGHT/2)),-BOLT_SPEED))
-        #move  bolt
-        if self._movement=="right":
-            self._aliens_forward(dt)
-        if self._movement=="left":
-            self._aliens_back(dt)
-
-    def _aliens_forward(self,dt):
+    def _sync_formation(self):
         """
-        Moves the existing aliens forward, i.e to the right
+        Moves the formation to the simulated origin, removing dead aliens
 
-        Parameter dt: Time since the last update
-        Precondition:dt must be a number(int or float)
+        Marching the aliens only moves the formation; the aliens themselves
+        never move inside it.
         """
-        assert isinstance(dt,int) or isinstance(dt,float)
+        origin=self._sim.getFormationOrigin()
+        if self._formation.x!=origin[0]:
+            self._formation.x=origin[0]
+        if self._formation.y!=origin[1]:
+            self._formation.y=origin[1]
 
-        self._time+=dt
-        if self._time>ALIEN_SPEED:
-            #increase alien steps and reset time
-            self._alienSteps+=1
-            self._time=0
-            #move all aliens
-            for row in self._aliens:
-                for alien in row:
-                    if not alien is None:
-                        alien.x+=ALIEN_H_WALK
-        #determine whether to move down
-        right_alien=self._right_most_alien()
-        if (GAME_WIDTH-(right_alien.x+ALIEN_WIDTH/2))<ALIEN_H_SEP:
-            self._movement="left"
-            self._move_down()
-
-    def _aliens_back(self,dt):
-        """
-        Moves the existing  aliens back i.e (to the left)
-
-        Parameter dt: Time since the last update
-        Precondition:dt must be a number(int or float)
-        """
-        assert isinstance(dt,int) or isinstance(dt,float)
+        for event in self._sim.getEvents():
+            if event[0]==EVENT_KILL:
+                self._formation.children=self._living_aliens()
+                break
 
-        self._time+=dt
-
-        if self._time>ALIEN_SPEED:
-            #add alien steps and reset time
-            self._alienSteps+=1
-            self._time=0
-            #move all aliens
-            for row in self._aliens:
-                for alien in row:
-                    if not alien is None:
-                        alien.x-=ALIEN_H_WALK
-        #determine whether to move down
-        left_alien=self._left_most_alien()
-        if  ALIEN_H_SEP>(left_alien.x-ALIEN_WIDTH/2):
-            self._movement="right"
-            self._move_down()
-
-    def _right_most_alien(self):
-        """
-        Returns any one existing alien in the right most column
-        """
-        for row in reversed(self._reverse_aliens()):
-            for alien in row:
-                if not alien is None:
-                    return alien
-
-    def _left_most_alien(self):
-        """
-        Returns any one existing alien in the left most column
-        """
-        for row in self._reverse_aliens():
-            for alien in row:
-                if not alien is None:
-                    return alien
-
-    def _reverse_aliens(self):
+    def _sync_bolts(self):
         """
-        Returns a 2-D list of _aliens with the rows and columns swapped
-        """
-        reverse=[]
-        for column in range(ALIENS_IN_ROW):
-            columns=[]
-            for row in self._aliens:
-                columns.append(row[column])
-            reverse.append(columns)
-        return reverse
-
-
-    def _move_down(self):
-        """
-        Moves all existing aliens down by the specified amount, i.e ALIEN_V_WALK
-        """
-        for row in self._aliens:
-            for alien in row:
-                if not alien is None:
-                    alien.y-=ALIEN_V_WALK
+        Creates, moves and removes bolt sprites to match the simulated bolts
 
-    def _fire(self,input):
+        New sprites come from _pool, and spent ones go back to it.
         """
-        Fires a bolt from the player
-
-        Parameter input: The input from the User
-        Precondition: input is an instance of GInput
-        """
-        assert isinstance(input,GInput)
-        if input.is_key_down("up"):
-            fire=True
-            for bolt in self._bolts:
-                if bolt.isPlayerBolt():
-                    fire =False
-            if fire:
-                self._bolts.append(Bolt(self._ship.x,(self._ship.y+SHIP_HEIGHT/2+BOLT_HEIGHT/2),BOLT_SPEED))
-
-    def _move_bolt(self):
-        """
-        Moves all existing bolts in _bolts
-        """
-        for bolt in self._bolts:
-            if bolt.isPlayerBolt():
-                bolt.y+=(bolt.getVelocity()+bolt.height/2)
-                if (bolt.y-BOLT_HEIGHT/2)>GAME_HEIGHT:
-                    self._bolts.remove(bolt)
-            else:
-                bolt.y+=(bolt.getVelocity()-bolt.height/2)
-                if (bolt.y+BOLT_HEIGHT/2)<0:
-                    self._bolts.remove(bolt)
-
-    def _alien_to_fire(self):
-        """
-        Returns a 1-D list of the current  x and y positions of a random alien in the bottom most row
-        """
-        alien=None
-        while alien is None:
-            column=random.randint(0,ALIENS_IN_ROW)
-            for row in reversed(self._aliens):
-                    try:
-                        if not row[column] is None:
-                            alien=row[column]
-                            return [alien.x,alien.y]
-                    except IndexError:
-                        alien=None
-
-    def _collides(self):
-        """
-        Checks if there is an alien bolt , or a player bolt and calls appropriate helpers to check for collision.
-        """
-        player_bolt=None
-        #to check for even one alien bolt
-        alien_bolt=None
-        for bolt in self._bolts:
-            if bolt.isPlayerBolt():
-                player_bolt=bolt
+        bolts={}
+        for sim_bolt in self._sim.getBolts():
+            bolt=self._bolts.pop(sim_bolt,None)
+            if bolt is None:
+                bolt=self._pool.acquire(sim_bolt.x,sim_bolt.y,sim_bolt.getVelocity())
             else:
-                alien_bolt=bolt
-
-        #check that there is at least one alien
-        if not player_bolt is None and self._aliens_exist():
-            self._alien_collides(player_bolt)
-
-        if not alien_bolt is None and not self._ship is None:
-            self._ship_collides()
-
-    def _aliens_exist(self):
-        """
-        Returns True if there is at least one Alien in _aliens, False otherwise
-        """
-        aliens_exist=False
-        for row in self._aliens:
-            for alien in row:
-                if not alien is None:
-                    aliens_exist=True
-        return aliens_exist
-
-    def _alien_collides(self,player_bolt):
-        """
-        Checks if any Alien has collided with a player bolt. Removes the bolt if collision occurs. Updates _playerScore
-
-        Parameter player_bolt: Player bolt to check for collision with
-        Precondition: player_bolt is an instance of Bolt, and must be a player_bolt
-        """
-        assert isinstance(player_bolt,Bolt)
-        assert player_bolt.isPlayerBolt()
-
-        for row in self._aliens:
-            for alien  in range(len(row)):
-                if not row[alien] is None and row[alien].collides(player_bolt):
-                    row[alien]=None
-                    self._bolts.remove(player_bolt)
-                    self._playerScore+=1
-
-    def _ship_collides(self):
-        """
-        Checks if the ship collides with any Alien bolt.Removes the bolt if collision occurs. Updates _lives.
-        """
-        for bolt in self._bolts:
-            if not bolt.isPlayerBolt() and self._ship.collides(bolt):
-                self._animator=self._animate_death()
-                next(self._animator)
-                self._bolts.remove(bolt)
-                self._lives-=1
-
-    def _animate_death(self):
-        """
-        Coroutine for animating the ship explosion
-        """
-        #time spent animating so far
-        time_passed=0
-        #error for frame selection
-        err=0.1
-        animating=True
-
-        while animating:
-            dt=(yield)
-            time_passed+=dt
-            value=(time_passed/DEATH_SPEED)*self._ship.getCount()
-            for frame in range(1,self._ship.getCount()):
-                if (abs(value-frame))<=err:
-                    self._ship.setFrame(frame)
-                    if self._ship.getFrame()==self._ship.getCount()-1:
-                        animating=False
-
-    def _checkEnd(self):
-        """
-        Check if the game is over. Updates _playerWon as appropriate
-        """
-        #check player win
-        win=True
-        for row in self._aliens:
-            for alien in row:
-                if not alien is None:
-                    win=False
-        if win:
-            self._playerWon=win
-        #loss
-        #check defense line breach
-        breach=False
-        for row in self._aliens:
-            for alien in row:
-                if not alien is None and (alien.y-ALIEN_HEIGHT/2)<=DEFENSE_LINE:
-                    breach=True
-        if breach:
-            self._playerWon= not breach
-        #check zero lives
-        if self._lives==0:
-            self._playerWon=False
+                bolt.y=sim_bolt.y
+            bolts[sim_bolt]=bolt
+        #whatever is left over has been spent
+        for bolt in self._bolts.values():
+            self._pool.release(bolt)
+        self._bolts=bolts